@@ -12,29 +12,24 @@ const BaseExpenseTracker = () => {
     useEffect(() => {
         const fetchData = async () => {
             try {
-                const summaryResponse = await fetch(`${BASE_URL}/analytics/summary/`, {
-                    headers: { Authorization: `Bearer ${accessToken}` }
-                });
-                
-                const categoryResponse = await fetch(`${BASE_URL}/analytics/category-wise/`, {
+                // One request for every chart on the page
+                const response = await fetch(`${BASE_URL}/analytics/dashboard/`, {
                     headers: { Authorization: `Bearer ${accessToken}` }
                 });
 
-                if (!summaryResponse.ok || !categoryResponse.ok) {
+                if (!response.ok) {
                     throw new Error('Failed to fetch data');
                 }
 
+                const dashboardData = await response.json();
 
-                const summaryData = await summaryResponse.json();
-                const categoryData = await categoryResponse.json();
-
-                // console.log(summaryData, categoryData);
-                setData({
-                    category_spending: categoryData.category_spending,
-                    total_spent: summaryData.total_spent,
-                    monthly_trend: summaryData.monthly_trend,
-                    daily_trend: summaryData.daily_trend
-                });
+                // No expenses yet: leave data empty so the placeholder shows
+                setData(Object.keys(dashboardData.daily_trend).length ? {
+                    category_spending: dashboardData.category_spending,
+                    total_spent: dashboardData.total_spent,
+                    monthly_trend: dashboardData.monthly_trend,
+                    daily_trend: dashboardData.daily_trend
+                } : null);
                 setLoading(false)
                 // category_spending, monthly_trend, daily_trend
             } catch (error) {
@@ -55,6 +55,7 @@ useEffect(() => {
     try {
       const response = await axios.get(`${BASE_URL}/expense/`, {
         headers: { Authorization: `Bearer ${accessToken}` },
+        params: { all: true },
       });
       setExpenses(response.data);
       setLoading(false)
@@ -2,18 +2,13 @@ import requests
 from django.http import JsonResponse
 from collections import namedtuple
 from django.db import connection
-import google.generativeai as genai
 from datetime import date
-from decouple import config
 
+from server import lazy
 
 
-API_KEY = config('API_KEY')
-    # Configure Gemini API
-genai.configure(api_key=API_KEY)
-
-    # Initialize the GenerativeModel
-model = genai.GenerativeModel('gemini-1.5-flash')
+# Gemini client is created on first use, not when this module is imported
+GEMINI_MODEL = 'gemini-1.5-flash'
 
 
 today = date.today()
@@ -62,7 +57,7 @@ def generate_sql_query_from_gemini(user_id, question):
     try:
         prompt = build_orm_prompt(user_id, question)
         
-        response = model.generate_content(prompt)
+        response = lazy.gemini_model(GEMINI_MODEL).generate_content(prompt)
         raw_response = response.text.strip()
         
         sql_query = raw_response
@@ -108,7 +103,7 @@ Only return a clear, friendly summary or answer — nothing else.
 """
 
     try:
-        response = model.generate_content(prompt)
+        response = lazy.gemini_model(GEMINI_MODEL).generate_content(prompt)
         # data = response.json()
         user_response = response.text.strip()
         if not user_response:
@@ -0,0 +1,222 @@
+"""
+Chart aggregates, read from the spend rollups instead of raw expenses.
+
+DailyCategorySpend and MonthlyUserSpend are kept in step with every expense
+write (see expense.rollups), so each query scans one row per active day or
+month rather than one per transaction. Buckets whose expenses were all
+deleted are left with a count of zero and are skipped. Keys and ordering
+match the original pandas implementation, so response shapes don't change.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from math import ceil
+
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncWeek, TruncYear
+
+from expense.models import DailyCategorySpend, MonthlyUserSpend
+
+# Finest to coarsest; weeks start on Monday
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+BUCKETS = {
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'quarter': TruncQuarter,
+    'year': TruncYear,
+}
+# Rough bucket widths, only used to guess how coarse a max_points limit needs to go
+BUCKET_DAYS = {'day': 1, 'week': 7, 'month': 30.44, 'quarter': 91.31, 'year': 365.25}
+
+
+def summary_data(user):
+    """
+    total_spent, monthly_trend ({"YYYY-MM": total}) and daily_trend
+    ({date: total}), or None when the user has no expenses.
+    """
+    monthly = (
+        MonthlyUserSpend.objects.filter(user=user, count__gt=0)
+        .values('month').annotate(total=Sum('total')).order_by('month')
+        .values_list('month', 'total')
+    )
+    monthly_trend = {month.strftime('%Y-%m'): total for month, total in monthly}
+    if not monthly_trend:
+        return None
+
+    daily = (
+        DailyCategorySpend.objects.filter(user=user, count__gt=0)
+        .values('day').annotate(total=Sum('total')).order_by('day')
+        .values_list('day', 'total')
+    )
+
+    return {
+        "total_spent": sum(monthly_trend.values()),
+        "monthly_trend": monthly_trend,
+        "daily_trend": dict(daily),
+    }
+
+
+def category_data(user):
+    """
+    category_spending ({category: total}), or None when the user has no expenses.
+    """
+    totals = (
+        MonthlyUserSpend.objects.filter(user=user, count__gt=0)
+        .values('category').annotate(total=Sum('total')).order_by('category')
+        .values_list('category', 'total')
+    )
+    category_spending = dict(totals)
+    if not category_spending:
+        return None
+    return {"category_spending": category_spending}
+
+
+def dashboard_data(user, today):
+    """
+    Everything the dashboard charts show, from a single query over the daily
+    rollup: total_spent, monthly_trend, daily_trend, category_spending and
+    current_month_total (this month up to and including ``today``).
+    """
+    rows = (
+        DailyCategorySpend.objects.filter(user=user, count__gt=0)
+        .values('day', 'category').annotate(total=Sum('total')).order_by('day')
+        .values_list('day', 'category', 'total')
+    )
+
+    start_of_month = today.replace(day=1)
+    monthly, daily, categories = defaultdict(Decimal), defaultdict(Decimal), defaultdict(Decimal)
+    current_month = Decimal('0')
+    for day, category, total in rows:
+        monthly[day.strftime('%Y-%m')] += total
+        daily[day] += total
+        categories[category] += total
+        if start_of_month <= day <= today:
+            current_month += total
+
+    return {
+        "total_spent": sum(monthly.values()),
+        "monthly_trend": dict(monthly),
+        "daily_trend": dict(daily),
+        "category_spending": dict(sorted(categories.items())),
+        "current_month_total": current_month,
+    }
+
+
+def _month_labels(first, last):
+    months, month = [], first
+    while month <= last:
+        months.append(month.strftime('%Y-%m'))
+        month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return months
+
+
+def pivot_data(user, start=None, end=None):
+    """
+    Category x month and payment method x category totals between ``start``
+    and ``end`` (inclusive, either open), from one grouped query.
+
+    Each matrix is {"rows": [...], "columns": [...], "values": [[...], ...]},
+    with values[i][j] the total for rows[i] and columns[j]. Months run
+    without gaps from the first to the last with spend, and missing cells
+    are zero. Returns None when there is no spend in range.
+    """
+    rows = DailyCategorySpend.objects.filter(user=user, count__gt=0)
+    if start:
+        rows = rows.filter(day__gte=start)
+    if end:
+        rows = rows.filter(day__lte=end)
+    cells = list(
+        rows.annotate(month=TruncMonth('day'))
+        .values('month', 'category', 'payment_method').annotate(total=Sum('total')).order_by()
+        .values_list('month', 'category', 'payment_method', 'total')
+    )
+    if not cells:
+        return None
+
+    months = _month_labels(min(cell[0] for cell in cells), max(cell[0] for cell in cells))
+    categories = sorted({category for _, category, _, _ in cells})
+    methods = sorted({method for _, _, method, _ in cells})
+    month_index = {label: j for j, label in enumerate(months)}
+    category_index = {category: i for i, category in enumerate(categories)}
+    method_index = {method: i for i, method in enumerate(methods)}
+
+    by_month = [[Decimal('0')] * len(months) for _ in categories]
+    by_method = [[Decimal('0')] * len(categories) for _ in methods]
+    for month, category, method, total in cells:
+        by_month[category_index[category]][month_index[month.strftime('%Y-%m')]] += total
+        by_method[method_index[method]][category_index[category]] += total
+
+    return {
+        "category_by_month": {"rows": categories, "columns": months, "values": by_month},
+        "payment_method_by_category": {"rows": methods, "columns": categories, "values": by_method},
+    }
+
+
+def spent_between(user, start, end):
+    """
+    Total spent on days start..end inclusive.
+    """
+    total = (
+        DailyCategorySpend.objects.filter(user=user, day__gte=start, day__lte=end)
+        .aggregate(total=Sum('total'))['total']
+    )
+    return total or 0
+
+
+def _bucket_totals(user, granularity, start, end):
+    rows = DailyCategorySpend.objects.filter(user=user, count__gt=0)
+    if start:
+        rows = rows.filter(day__gte=start)
+    if end:
+        rows = rows.filter(day__lte=end)
+    if granularity != 'day':
+        rows = rows.annotate(bucket=BUCKETS[granularity]('day'))
+    bucket = 'day' if granularity == 'day' else 'bucket'
+    return list(rows.values(bucket).annotate(total=Sum('total')).order_by(bucket).values_list(bucket, 'total'))
+
+
+def _merge_buckets(buckets, max_points):
+    """
+    Sum runs of consecutive buckets so at most ``max_points`` remain, each
+    keyed by the start of its run.
+    """
+    size = ceil(len(buckets) / max_points)
+    return [
+        (buckets[i][0], sum(total for _, total in buckets[i:i + size]))
+        for i in range(0, len(buckets), size)
+    ]
+
+
+def trend_data(user, granularity='day', start=None, end=None, max_points=None):
+    """
+    Spend between ``start`` and ``end`` (inclusive, either open) bucketed by
+    ``granularity``.
+
+    With ``max_points``, a series that would be longer is re-bucketed at the
+    next granularity coarse enough to fit. If even years are too many, runs
+    of buckets are summed. Totals are preserved either way, because buckets
+    are added together rather than sampled. Returns None when there is no
+    spend in range.
+    """
+    buckets = _bucket_totals(user, granularity, start, end)
+    if not buckets:
+        return None
+
+    downsampled = False
+    if max_points and len(buckets) > max_points:
+        downsampled = True
+        span = (buckets[-1][0] - buckets[0][0]).days + 1
+        for coarser in GRANULARITIES[GRANULARITIES.index(granularity) + 1:]:
+            granularity = coarser
+            if span / BUCKET_DAYS[coarser] <= max_points:
+                break
+        buckets = _bucket_totals(user, granularity, start, end)
+        if len(buckets) > max_points:
+            buckets = _merge_buckets(buckets, max_points)
+
+    return {
+        "total_spent": sum(total for _, total in buckets),
+        "granularity": granularity,
+        "downsampled": downsampled,
+        "trend": dict(buckets),
+    }
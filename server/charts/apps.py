@@ -1,6 +1,46 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+import json
 
 
 class ChartsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'charts'
+
+    def ready(self):
+        from expense.rollups import expense_rows_changed
+        from expense_scheduler.models import ExpenseSchedule
+        from users.models import UserProfile
+        from .forecast import on_forecast_inputs_changed
+        from .heatmap import on_expense_rows_changed
+
+        # Patch cached heatmaps in place rather than rebuilding them
+        expense_rows_changed.connect(on_expense_rows_changed, dispatch_uid='charts.heatmap')
+
+        # The budget and schedules feed cached forecasts without touching expenses
+        for model in (UserProfile, ExpenseSchedule):
+            for signal in (post_save, post_delete):
+                signal.connect(on_forecast_inputs_changed, sender=model, dispatch_uid=f'charts.forecast.{model.__name__}')
+
+        post_migrate.connect(self.setup_periodic_tasks, sender=self)
+
+    def setup_periodic_tasks(self, sender, **kwargs):
+
+        from django_celery_beat.models import PeriodicTask, CrontabSchedule
+
+        # Just after midnight UTC, when the analytics views' "today" rolls over
+        schedule, created = CrontabSchedule.objects.get_or_create(
+            minute='15',
+            hour='0',
+            day_of_week='*',
+            day_of_month='*',
+            month_of_year='*',
+            timezone='UTC',
+        )
+
+        PeriodicTask.objects.get_or_create(
+            crontab=schedule,
+            name='Precompute Spend Forecasts Nightly',
+            task='charts.tasks.precompute_spend_forecasts',
+            defaults={'kwargs': json.dumps({})}
+        )
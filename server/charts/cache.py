@@ -0,0 +1,77 @@
+"""
+Per-user result cache for the analytics endpoints.
+
+Entries are keyed by the user's expense data version (expense.versions), so
+any write that changes their totals makes older entries unreachable. They
+are never served stale, and the timeout only bounds how long dead entries
+occupy memory. The cache is the shared default backend, so every worker
+reuses one computation. Hits and misses are counted per endpoint; see
+``manage.py charts_cache_stats``.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from expense.versions import get_data_version
+
+STATS_KEY = "charts:stats:{name}:{outcome}"
+
+
+def record_lookup(name, outcome):
+    """Count a cache ``hit`` or ``miss`` for ``name`` in the stats."""
+    key = STATS_KEY.format(name=name, outcome=outcome)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def result_key(name, user_id, params=None):
+    """
+    Cache key for this endpoint and ``params`` at the user's current data version.
+    """
+    key = f"charts:{name}:{user_id}:{get_data_version(user_id)}"
+    if params:
+        key += ":" + hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    return key
+
+
+def store_result(key, result):
+    # Wrapped so a cached None is told apart from a miss
+    cache.set(key, (result,), timeout=getattr(settings, "CHARTS_CACHE_TIMEOUT", 7 * 24 * 60 * 60))
+
+
+def cached_result(name, user, compute, params=None):
+    """
+    ``compute()``'s result for this user, endpoint and ``params``, computed at
+    most once per data version. ``None`` results are cached too.
+    """
+    key = result_key(name, user.pk, params)
+    entry = cache.get(key)
+    if entry is not None:
+        record_lookup(name, "hit")
+        return entry[0]
+
+    record_lookup(name, "miss")
+    result = compute()
+    store_result(key, result)
+    return result
+
+
+def get_stats(names):
+    keys = {
+        (name, outcome): STATS_KEY.format(name=name, outcome=outcome)
+        for name in names for outcome in ("hit", "miss")
+    }
+    values = cache.get_many(keys.values())
+    return {
+        name: {outcome: values.get(keys[(name, outcome)], 0) for outcome in ("hit", "miss")}
+        for name in names
+    }
+
+
+def reset_stats(names):
+    cache.delete_many([STATS_KEY.format(name=name, outcome=outcome) for name in names for outcome in ("hit", "miss")])
@@ -0,0 +1,235 @@
+"""
+Month-end spend forecast by Monte Carlo simulation.
+
+Each remaining day of the month is filled by resampling a whole historical
+day of the user's spend (all categories together, so categories that move
+together still do), drawn from days with the same weekday. Thousands of
+paths are drawn at once as NumPy index arrays. Known upcoming ExpenseSchedule
+occurrences are added to every path as fixed amounts. Past scheduled
+expenses are taken out of the history, so they are not also resampled.
+
+History comes from the DailyCategorySpend rollup, from the user's first
+recorded spend day or FORECAST_HISTORY_DAYS back, whichever is later. Today
+counts as spent so far; the simulation starts tomorrow.
+
+``load_inputs`` reads everything for a batch of users in a fixed number of
+queries, so the nightly job (charts.tasks.precompute_spend_forecasts) can
+walk every active user. Forecasts are cached under the user's expense data
+version; saving their profile (the budget) or a schedule bumps it too.
+"""
+import calendar
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Min
+
+from expense.models import DailyCategorySpend, Expense
+from expense.versions import bump_data_version
+from expense_scheduler.models import ExpenseSchedule
+from server import lazy
+from users.models import UserProfile
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# history: {day: {category: total}} for every day in the window, including
+# days without spend; spent and scheduled: {category: total} for this month
+# so far and for the rest of it; budget: the monthly budget, or None
+ForecastInputs = namedtuple('ForecastInputs', ['history', 'spent', 'scheduled', 'budget'])
+
+
+def month_end(today):
+    return today.replace(day=calendar.monthrange(today.year, today.month)[1])
+
+
+def _add_months(day, months, anchor_day):
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return day.replace(year=year, month=month, day=min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def _next_occurrence(schedule, day):
+    # Mirrors expense_scheduler.tasks.process_expense_schedules
+    if schedule.frequency == 'daily':
+        return day + timedelta(days=schedule.interval)
+    if schedule.frequency == 'weekly':
+        return day + timedelta(weeks=schedule.interval)
+    if schedule.frequency == 'monthly':
+        return _add_months(day, schedule.interval, schedule.start_date.day)
+    if schedule.frequency == 'yearly':
+        return _add_months(day, 12 * schedule.interval, day.day)
+    return None
+
+
+def upcoming_occurrences(schedule, today, until):
+    """
+    Days in today..until on which ``schedule`` still has to add an expense.
+
+    A schedule that is due (or overdue) and not yet processed today fires
+    once today; process_expense_schedules dates the expense on the day it runs.
+    """
+    if schedule.start_date > until:
+        return []
+
+    day = schedule.next_occurrence or schedule.start_date
+    if day <= today:
+        if schedule.last_processed == today:
+            return []
+        day = today
+
+    days = []
+    while day is not None and day <= until and not (schedule.end_date and day > schedule.end_date):
+        days.append(day)
+        day = _next_occurrence(schedule, day)
+    return days
+
+
+def load_inputs(user_ids, today):
+    """
+    ForecastInputs for each of ``user_ids`` that has any spend, keyed by user id.
+    """
+    history_days = getattr(settings, 'FORECAST_HISTORY_DAYS', 90)
+    start_of_month, end_of_month = today.replace(day=1), month_end(today)
+    window_start = min(today - timedelta(days=history_days), start_of_month)
+
+    first_days = dict(
+        DailyCategorySpend.objects.filter(user_id__in=user_ids, count__gt=0)
+        .values('user_id').annotate(first_day=Min('day'))
+        .values_list('user_id', 'first_day')
+    )
+    if not first_days:
+        return {}
+
+    history = {}
+    for user_id, first_day in first_days.items():
+        start = max(first_day, today - timedelta(days=history_days))
+        history[user_id] = {
+            start + timedelta(days=offset): defaultdict(Decimal) for offset in range((today - start).days)
+        }
+    spent = defaultdict(lambda: defaultdict(Decimal))
+    rows = DailyCategorySpend.objects.filter(
+        user_id__in=first_days, day__gte=window_start, day__lte=today, count__gt=0
+    ).values_list('user_id', 'day', 'category', 'total')
+    for user_id, day, category, total in rows:
+        if day in history[user_id]:
+            history[user_id][day][category] += total
+        if day >= start_of_month:
+            spent[user_id][category] += total
+
+    scheduled = defaultdict(lambda: defaultdict(Decimal))
+    signatures = set()
+    for schedule in ExpenseSchedule.objects.filter(user_id__in=first_days, is_active=True):
+        signatures.add((schedule.user_id, schedule.amount, schedule.category, schedule.description))
+        occurrences = upcoming_occurrences(schedule, today, end_of_month)
+        scheduled[schedule.user_id][schedule.category] += schedule.amount * len(occurrences)
+
+    if signatures:
+        # Expenses the scheduler already created look exactly like their schedule
+        past = Expense.objects.filter(
+            user_id__in={user_id for user_id, *_ in signatures},
+            date__gte=window_start, date__lt=today,
+            amount__in={amount for _, amount, _, _ in signatures},
+        ).values_list('user_id', 'date', 'category', 'amount', 'description')
+        for user_id, day, category, amount, description in past:
+            if (user_id, amount, category, description) in signatures and day in history[user_id]:
+                totals = history[user_id][day]
+                totals[category] = max(totals[category] - amount, Decimal('0'))
+
+    budgets = dict(
+        UserProfile.objects.filter(user_id__in=first_days, monthly_budget__gt=0)
+        .values_list('user_id', 'monthly_budget')
+    )
+
+    return {
+        user_id: ForecastInputs(
+            history=history[user_id],
+            spent=dict(spent[user_id]),
+            scheduled=dict(scheduled[user_id]),
+            budget=budgets.get(user_id),
+        )
+        for user_id in first_days
+    }
+
+
+def simulate(inputs, today, paths=None, seed=None):
+    """
+    Forecast of this month's total from ``inputs``, or None when there are
+    fewer than FORECAST_MIN_HISTORY_DAYS days of history to resample.
+
+    Percentile bands are of the month-end total (spent so far, plus scheduled,
+    plus simulated), overall and per category. ``exceed_probability`` is the
+    share of paths that end above the budget.
+    """
+    np = lazy.get('numpy')
+    paths = paths or getattr(settings, 'FORECAST_PATHS', 5000)
+    if len(inputs.history) < getattr(settings, 'FORECAST_MIN_HISTORY_DAYS', 14):
+        return None
+
+    history_days = sorted(inputs.history)
+    # Whatever was recorded; schedules aren't held to Expense.CATEGORIES
+    categories = sorted({
+        category for totals in (*inputs.history.values(), inputs.spent, inputs.scheduled) for category in totals
+    })
+    matrix = np.array(
+        [[float(inputs.history[day].get(category, 0)) for category in categories] for day in history_days]
+    ).reshape(len(history_days), len(categories))
+    weekdays = np.array([day.weekday() for day in history_days])
+
+    remaining = [today + timedelta(days=offset) for offset in range(1, (month_end(today) - today).days + 1)]
+    days_per_weekday = np.bincount(np.array([day.weekday() for day in remaining], dtype=int), minlength=7)
+
+    rng = np.random.default_rng(seed)
+    simulated = np.zeros((paths, len(categories)))
+    for weekday in np.flatnonzero(days_per_weekday):
+        pool = np.flatnonzero(weekdays == weekday)
+        if len(pool) < 2:
+            # Too few of this weekday to resample from; use any day
+            pool = np.arange(len(history_days))
+        drawn = rng.choice(pool, size=(paths, days_per_weekday[weekday]))
+        simulated += matrix[drawn].sum(axis=1)
+
+    known = np.array([
+        float(inputs.spent.get(category, 0) + inputs.scheduled.get(category, 0)) for category in categories
+    ])
+    per_category = simulated + known
+    totals = per_category.sum(axis=1)
+
+    bands = np.percentile(totals, PERCENTILES)
+    category_bands = np.percentile(per_category, PERCENTILES, axis=0)
+    budget = float(inputs.budget) if inputs.budget else None
+
+    return {
+        "month": today.strftime('%Y-%m'),
+        "as_of": today,
+        "days_remaining": len(remaining),
+        "history_days": len(history_days),
+        "paths": paths,
+        "spent_to_date": sum(inputs.spent.values(), Decimal('0')),
+        "scheduled": sum(inputs.scheduled.values(), Decimal('0')),
+        "budget": budget,
+        "exceed_probability": float((totals > budget).mean()) if budget else None,
+        "percentiles": {f"p{p}": float(value) for p, value in zip(PERCENTILES, bands)},
+        "categories": {
+            category: {f"p{p}": float(value) for p, value in zip(PERCENTILES, category_bands[:, i])}
+            for i, category in enumerate(categories)
+            if category_bands[-1, i] > 0
+        },
+    }
+
+
+def forecast_seed(user_id, today):
+    # Same paths all day, so the bands don't jitter every time they are recomputed
+    return [user_id, today.toordinal()]
+
+
+def spend_forecast(user, today):
+    inputs = load_inputs([user.pk], today).get(user.pk)
+    if inputs is None:
+        return None
+    return simulate(inputs, today, seed=forecast_seed(user.pk, today))
+
+
+def on_forecast_inputs_changed(sender, instance, **kwargs):
+    # A UserProfile or ExpenseSchedule write; both feed the forecast but not the rollups
+    bump_data_version([instance.user_id])
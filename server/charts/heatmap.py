@@ -0,0 +1,136 @@
+"""
+Calendar heatmap: a user's daily totals for one year as a packed array.
+
+Each (user, year) is cached as the bytes of an ``array('d')`` with one slot
+per day of the year, index 0 being 1 January. It is built once from the
+daily rollup. After that it is patched in place whenever
+``expense_rows_changed`` reports changed days. The patch re-reads those
+days' totals from the rollup and assigns them, rather than adding deltas, so
+applying a patch twice or late is harmless.
+
+Builds and patches of the same array take a short cache lock, so a build
+that read the rollup before a commit cannot overwrite the patch for it. If a
+patch can't get the lock, it drops the entry and the next request rebuilds
+it. Every patch also bumps a per-key generation, and a build that sees the
+generation move while it was reading throws its result away, which covers a
+build that outlived its lock.
+"""
+import calendar
+from array import array
+from collections import defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+
+from expense.models import DailyCategorySpend
+from server import locks
+from .cache import record_lookup
+
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2
+
+
+def _key(user_id, year):
+    return f"charts:heatmap:{user_id}:{year}"
+
+
+def _generation(key):
+    return cache.get(f"{key}:generation", 0)
+
+
+def _bump_generation(key):
+    generation_key = f"{key}:generation"
+    timeout = getattr(settings, "CHARTS_CACHE_TIMEOUT", 7 * 24 * 60 * 60)
+    if not cache.add(generation_key, 1, timeout=timeout):
+        try:
+            cache.incr(generation_key)
+        except ValueError:
+            cache.set(generation_key, 1, timeout=timeout)
+
+
+def _day_totals(user_id, **filters):
+    return (
+        DailyCategorySpend.objects.filter(user_id=user_id, **filters)
+        .values('day').annotate(total=Sum('total')).order_by()
+        .values_list('day', 'total')
+    )
+
+
+def _build(user_id, year):
+    days = array('d', bytes(8 * (366 if calendar.isleap(year) else 365)))
+    start = date(year, 1, 1)
+    for day, total in _day_totals(user_id, day__gte=start, day__lte=date(year, 12, 31)):
+        days[(day - start).days] = float(total)
+    return days
+
+
+def _store(key, days):
+    cache.set(key, days.tobytes(), timeout=getattr(settings, "CHARTS_CACHE_TIMEOUT", 7 * 24 * 60 * 60))
+
+
+def daily_totals(user_id, year):
+    """
+    ``array('d')`` of the user's spend on each day of ``year``.
+    """
+    key = _key(user_id, year)
+    packed = cache.get(key)
+    if packed is None:
+        record_lookup('heatmap', 'miss')
+        lock_key = f"{key}:lock"
+        token = locks.acquire(lock_key, LOCK_TIMEOUT, wait=LOCK_WAIT)
+        try:
+            generation = _generation(key)
+            days = _build(user_id, year)
+            if token:
+                _store(key, days)
+                # A patch that landed after the read may have missed the stored array
+                if _generation(key) != generation:
+                    cache.delete(key)
+        finally:
+            locks.release(lock_key, token)
+        return days
+
+    record_lookup('heatmap', 'hit')
+    days = array('d')
+    days.frombytes(packed)
+    return days
+
+
+def patch_daily_totals(user_days):
+    """
+    Refresh the cached slots for ``user_days`` ({user_id: days}); years that
+    aren't cached are left for the next request to build.
+    """
+    for user_id, days in user_days.items():
+        by_year = defaultdict(set)
+        for day in days:
+            by_year[day.year].add(day)
+
+        for year, changed in by_year.items():
+            key = _key(user_id, year)
+            lock_key = f"{key}:lock"
+            token = locks.acquire(lock_key, LOCK_TIMEOUT, wait=LOCK_WAIT)
+            # Before the delete below, so a build storing concurrently drops its result
+            _bump_generation(key)
+            if token is None:
+                cache.delete(key)
+                continue
+            try:
+                packed = cache.get(key)
+                if packed is None:
+                    continue
+                totals = array('d')
+                totals.frombytes(packed)
+                current = dict(_day_totals(user_id, day__in=changed))
+                start = date(year, 1, 1)
+                for day in changed:
+                    totals[(day - start).days] = float(current.get(day, 0))
+                _store(key, totals)
+            finally:
+                locks.release(lock_key, token)
+
+
+def on_expense_rows_changed(sender, user_days, **kwargs):
+    patch_daily_totals(user_days)
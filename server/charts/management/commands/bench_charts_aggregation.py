@@ -0,0 +1,120 @@
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from charts.aggregates import category_data, summary_data
+from expense.models import Expense
+from expense.rollups import reconcile_user_rollups
+
+
+def pandas_summary(user):
+    """The previous charts.views.summary body, kept as the baseline."""
+    expenses = Expense.objects.filter(user=user)
+    df = pd.DataFrame(list(expenses.values('date', 'category', 'amount')))
+    df['date'] = pd.to_datetime(df['date'])
+
+    monthly_trend = df.groupby(df['date'].dt.to_period('M'))['amount'].sum()
+    return {
+        "total_spent": df['amount'].sum(),
+        "monthly_trend": {str(period): value for period, value in monthly_trend.items()},
+        "daily_trend": df.groupby(df['date'].dt.date)['amount'].sum().to_dict(),
+    }
+
+
+def pandas_category(user):
+    """The previous charts.views.category_wise body, kept as the baseline."""
+    df = pd.DataFrame(list(Expense.objects.filter(user=user).values('category', 'amount')))
+    return {"category_spending": df.groupby('category')['amount'].sum().to_dict()}
+
+
+def measure(repeat, fn):
+    """Best wall time over ``repeat`` runs and peak traced allocation of one run."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare the pandas chart aggregation with the rollup-backed one (latency and peak Python memory)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Benchmark an existing user's data instead of seeding one.")
+        parser.add_argument("--rows", type=int, default=100000, help="Expenses to seed for a throwaway user.")
+        parser.add_argument("--days", type=int, default=5 * 365, help="Spread seeded expenses over this many days.")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        if options["user"] is not None:
+            try:
+                user = User.objects.get(id=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist.")
+            self.run(user, options["repeat"])
+            return
+
+        # Seed inside a transaction that is always rolled back
+        try:
+            with transaction.atomic():
+                user = User.objects.create(username=f"bench-charts-{time.time_ns()}")
+                self.seed(user, options["rows"], options["days"])
+                self.run(user, options["repeat"])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def seed(self, user, rows, days):
+        rng = random.Random(42)
+        categories = [c for c, _ in Expense.CATEGORIES]
+        methods = [m for m, _ in Expense.PAYMENT_METHODS]
+        start = date.today() - timedelta(days=days)
+        Expense.objects.bulk_create(
+            (
+                Expense(
+                    user=user,
+                    amount=Decimal(rng.randint(100, 500000)) / 100,
+                    category=rng.choice(categories),
+                    date=start + timedelta(days=rng.randint(0, days)),
+                    payment_method=rng.choice(methods),
+                )
+                for _ in range(rows)
+            ),
+            batch_size=5000,
+        )
+        # bulk_create skips the rollup signals; build the rollups in one pass
+        reconcile_user_rollups(user.id)
+        self.stdout.write(f"Seeded {rows} expenses over {days} days.")
+
+    def run(self, user, repeat):
+        rows = Expense.objects.filter(user=user).count()
+        self.stdout.write(f"user {user.id}: {rows} expenses")
+        self.stdout.write(f"{'endpoint':<14}  {'pandas (s)':>10}  {'rollup (s)':>10}  {'pandas MiB':>10}  {'rollup MiB':>10}  {'speedup':>7}")
+
+        for label, old, new in (
+            ("summary", pandas_summary, summary_data),
+            ("category-wise", pandas_category, category_data),
+        ):
+            old_time, old_peak = measure(repeat, lambda: old(user))
+            new_time, new_peak = measure(repeat, lambda: new(user))
+            self.stdout.write(
+                f"{label:<14}  {old_time:>10.3f}  {new_time:>10.3f}  "
+                f"{old_peak / 2**20:>10.1f}  {new_peak / 2**20:>10.1f}  {old_time / new_time:>6.1f}x"
+            )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from charts.cache import get_stats, reset_stats
+from charts.views import CACHED_ENDPOINTS
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters of the analytics result cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Zero the counters after printing them.")
+
+    def handle(self, *args, **options):
+        stats = get_stats(CACHED_ENDPOINTS)
+        self.stdout.write(f"{'endpoint':<16}  {'hits':>8}  {'misses':>8}  {'hit rate':>8}")
+        for name, counts in stats.items():
+            total = counts["hit"] + counts["miss"]
+            rate = f"{counts['hit'] / total:.1%}" if total else "-"
+            self.stdout.write(f"{name:<16}  {counts['hit']:>8}  {counts['miss']:>8}  {rate:>8}")
+
+        if options["reset"]:
+            reset_stats(CACHED_ENDPOINTS)
+            self.stdout.write("Counters reset.")
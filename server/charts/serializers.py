@@ -8,4 +8,39 @@ class SummarySerializer(serializers.Serializer):
     daily_trend = serializers.DictField(child=serializers.FloatField())
 
 class CategoryWiseSerializer(serializers.Serializer):
-    category_spending = serializers.DictField(child=serializers.FloatField())
\ No newline at end of file
+    category_spending = serializers.DictField(child=serializers.FloatField())
+
+class TrendSerializer(serializers.Serializer):
+    total_spent = serializers.FloatField()
+    granularity = serializers.CharField()
+    downsampled = serializers.BooleanField()
+    trend = serializers.DictField(child=serializers.FloatField())
+
+class DashboardSerializer(serializers.Serializer):
+    total_spent = serializers.FloatField()
+    monthly_trend = serializers.DictField(child=serializers.FloatField())
+    daily_trend = serializers.DictField(child=serializers.FloatField())
+    category_spending = serializers.DictField(child=serializers.FloatField())
+    current_month_total = serializers.FloatField()
+
+class ForecastSerializer(serializers.Serializer):
+    month = serializers.CharField()
+    as_of = serializers.DateField()
+    days_remaining = serializers.IntegerField()
+    history_days = serializers.IntegerField()
+    paths = serializers.IntegerField()
+    spent_to_date = serializers.FloatField()
+    scheduled = serializers.FloatField()
+    budget = serializers.FloatField(allow_null=True)
+    exceed_probability = serializers.FloatField(allow_null=True)
+    percentiles = serializers.DictField(child=serializers.FloatField())
+    categories = serializers.DictField(child=serializers.DictField(child=serializers.FloatField()))
+
+class MatrixSerializer(serializers.Serializer):
+    rows = serializers.ListField(child=serializers.CharField())
+    columns = serializers.ListField(child=serializers.CharField())
+    values = serializers.ListField(child=serializers.ListField(child=serializers.FloatField()))
+
+class PivotSerializer(serializers.Serializer):
+    category_by_month = MatrixSerializer()
+    payment_method_by_category = MatrixSerializer()
@@ -0,0 +1,40 @@
+from datetime import timedelta
+from itertools import islice
+
+from celery import shared_task
+from django.conf import settings
+from django.utils.timezone import now
+
+from expense.models import DailyCategorySpend
+from .cache import result_key, store_result
+from .forecast import forecast_seed, load_inputs, simulate
+
+
+@shared_task
+def precompute_spend_forecasts(batch_size=200):
+    """
+    Compute this month's forecast for every user with recent spend and store
+    it where the analytics/forecast/ endpoint reads it, so the endpoint is a
+    cache read until the user next changes an expense.
+    """
+    today = now().date()
+    since = today - timedelta(days=getattr(settings, 'FORECAST_HISTORY_DAYS', 90))
+    user_ids = iter(
+        DailyCategorySpend.objects.filter(day__gte=since, count__gt=0)
+        .values_list('user_id', flat=True).distinct().order_by('user_id')
+    )
+
+    users = forecasts = 0
+    while batch := list(islice(user_ids, batch_size)):
+        # Keys are taken before reading, so a write during the run orphans
+        # the entry instead of leaving a stale one reachable
+        keys = {user_id: result_key('forecast', user_id, {"today": today}) for user_id in batch}
+        inputs = load_inputs(batch, today)
+        for user_id in batch:
+            result = None
+            if user_id in inputs:
+                result = simulate(inputs[user_id], today, seed=forecast_seed(user_id, today))
+            store_result(keys[user_id], result)
+            users += 1
+            forecasts += result is not None
+    return f"Precomputed forecasts for {users} users ({forecasts} with enough history)"
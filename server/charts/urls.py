@@ -7,6 +7,10 @@ urlpatterns = [
     path('summary/', views.summary, name='summary'),
     path('category-wise/', views.category_wise, name='category-wise'),
     path('monthly-trend/', views.current_month_total_expenses, name='monthly-trend'),
+    path('dashboard/', views.dashboard, name='dashboard'),
+    path('forecast/', views.forecast, name='forecast'),
+    path('pivot/', views.pivot, name='pivot'),
+    path('heatmap/', views.heatmap, name='heatmap'),
 ]
 
 # Frontend visualization hint (using Chart.js or similar library):
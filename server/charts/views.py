@@ -3,56 +3,91 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import serializers, status
-from expense.models import Expense
-import pandas as pd
-from .serializers import  SummarySerializer, CategoryWiseSerializer
+from .serializers import  SummarySerializer, CategoryWiseSerializer, TrendSerializer, DashboardSerializer, ForecastSerializer, PivotSerializer
+from .aggregates import summary_data, category_data, spent_between, trend_data, dashboard_data, pivot_data, GRANULARITIES
+from expense.filters import parse_date_param
+from .cache import cached_result
+from .forecast import spend_forecast
+from .heatmap import daily_totals
 
-from datetime import timedelta
 from django.utils.timezone import now
-from django.db.models import Sum
+from datetime import date
+
+# Endpoint names used for cache keys and hit/miss stats
+CACHED_ENDPOINTS = ('summary', 'category-wise', 'monthly-trend', 'dashboard', 'forecast', 'pivot', 'heatmap')
+
+
+def _serialized(serializer_class, data):
+    if data is None:
+        return None
+    serializer = serializer_class(data=data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.data
+
+
+def _trend_params(params):
+    """
+    Validated from/to/granularity/max_points, or None when none were given.
+    """
+    if not any(params.get(name) for name in ('from', 'to', 'granularity', 'max_points')):
+        return None
+
+    start = parse_date_param(params, 'from')
+    end = parse_date_param(params, 'to')
+    if start and end and start > end:
+        raise ValueError("'from' must not be after 'to'.")
+
+    granularity = params.get('granularity') or 'day'
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"'granularity' must be one of: {', '.join(GRANULARITIES)}.")
+
+    max_points = params.get('max_points')
+    if max_points:
+        try:
+            max_points = int(max_points)
+        except ValueError:
+            max_points = 0
+        if max_points < 2:
+            raise ValueError("'max_points' must be an integer of at least 2.")
+
+    return {'start': start, 'end': end, 'granularity': granularity, 'max_points': max_points or None}
+
 
 # Get user-specific summary
+# With ?from=&to=&granularity=&max_points= the response is one bucketed trend
+# for that range; without them it is the lifetime monthly and daily trends
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def summary(request):
-    expenses = Expense.objects.filter(user=request.user)
-    if not expenses.exists():
+    try:
+        trend_params = _trend_params(request.query_params)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if trend_params is None:
+        data = cached_result('summary', request.user, lambda: _serialized(SummarySerializer, summary_data(request.user)))
+    else:
+        data = cached_result(
+            'summary', request.user,
+            lambda: _serialized(TrendSerializer, trend_data(request.user, **trend_params)),
+            trend_params,
+        )
+    if data is None:
         return Response({"message": "No expenses found for this user."}, status=status.HTTP_404_NOT_FOUND)
-    
-    df = pd.DataFrame(list(expenses.values('date', 'category', 'amount')))
-    df['date'] = pd.to_datetime(df['date'])
-    
-    total_spent = df['amount'].sum()
-    monthly_trend = df.groupby(df['date'].dt.to_period('M'))['amount'].sum()
-    monthly_trend = {str(period): value for period, value in monthly_trend.items()}
-    daily_trend = df.groupby(df['date'].dt.date)['amount'].sum().to_dict()
-    
-    data = {
-        "total_spent": total_spent,
-        "monthly_trend": monthly_trend,
-        "daily_trend": daily_trend
-    }
-    serializer = SummarySerializer(data=data)
-    serializer.is_valid(raise_exception=True)
-    
-    return Response(serializer.data)
+
+    return Response(data)
 
 # Get user-specific category breakdown
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def category_wise(request):
-    expenses = Expense.objects.filter(user=request.user)
-    if not expenses.exists():
+    data = cached_result(
+        'category-wise', request.user, lambda: _serialized(CategoryWiseSerializer, category_data(request.user))
+    )
+    if data is None:
         return Response({"message": "No expenses found for this user."}, status=status.HTTP_404_NOT_FOUND)
-    
-    df = pd.DataFrame(list(expenses.values('category', 'amount')))
-    category_spending = df.groupby('category')['amount'].sum().to_dict()
-    
-    data = {"category_spending": category_spending}
-    serializer = CategoryWiseSerializer(data=data)
-    serializer.is_valid(raise_exception=True)
-    
-    return Response(serializer.data)
+
+    return Response(data)
 
 
 
@@ -62,12 +97,89 @@ def current_month_total_expenses(request):
     today = now().date()
     start_of_month = today.replace(day=1)
     
-    # Calculate total expenses for the current month
-    total_expenses = Expense.objects.filter(
-        user=request.user,
-        date__gte=start_of_month,
-        date__lt=today + timedelta(days=1)  # To include today's expenses
-    ).aggregate(total_spent=Sum('amount'))['total_spent'] or 0
+    # Calculate total expenses for the current month, up to and including today
+    total_expenses = cached_result(
+        'monthly-trend', request.user, lambda: spent_between(request.user, start_of_month, today), {"today": today}
+    )
+
+
+    return Response({"current_month_total": total_expenses}, status=status.HTTP_200_OK)
 
 
-    return Response({"current_month_total": total_expenses}, status=status.HTTP_200_OK)
\ No newline at end of file
+
+# Summary, category breakdown and current month total in one response
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    today = now().date()
+    data = cached_result(
+        'dashboard', request.user,
+        lambda: _serialized(DashboardSerializer, dashboard_data(request.user, today)),
+        {"today": today},
+    )
+    return Response(data, status=status.HTTP_200_OK)
+
+
+# Category x month and payment method x category cross-tabs as compact matrices,
+# optionally limited to ?from=&to=
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def pivot(request):
+    try:
+        start = parse_date_param(request.query_params, 'from')
+        end = parse_date_param(request.query_params, 'to')
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if start and end and start > end:
+        return Response({"error": "'from' must not be after 'to'."}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = cached_result(
+        'pivot', request.user,
+        lambda: _serialized(PivotSerializer, pivot_data(request.user, start, end)),
+        {"start": start, "end": end},
+    )
+    if data is None:
+        return Response({"message": "No expenses found for this user."}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response(data)
+
+
+
+# Daily totals for ?year= (default: this year), totals[i] being day i after start
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def heatmap(request):
+    year = request.query_params.get('year') or now().year
+    try:
+        year = int(year)
+        if not 1 <= year <= 9999:
+            raise ValueError
+    except ValueError:
+        return Response({"error": "'year' must be a year between 1 and 9999."}, status=status.HTTP_400_BAD_REQUEST)
+
+    totals = daily_totals(request.user.pk, year)
+    return Response({
+        "year": year,
+        "start": date(year, 1, 1),
+        "days": len(totals),
+        "total": round(sum(totals), 2),
+        "max": max(totals),
+        "totals": [round(total, 2) for total in totals],
+    })
+
+
+
+# Month-end spend forecast: percentile bands and the chance of going over budget.
+# Precomputed nightly by charts.tasks.precompute_spend_forecasts; recomputed
+# here only after the user has changed an expense since
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def forecast(request):
+    today = now().date()
+    data = cached_result('forecast', request.user, lambda: spend_forecast(request.user, today), {"today": today})
+    if data is None:
+        return Response(
+            {"message": "Not enough spending history to forecast this month."}, status=status.HTTP_404_NOT_FOUND
+        )
+
+    return Response(_serialized(ForecastSerializer, data), status=status.HTTP_200_OK)
@@ -0,0 +1,120 @@
+"""
+Budget alert engine.
+
+After a write, the current month's spend is read from the MonthlyUserSpend
+rollup and compared with the overall budget (UserProfile.monthly_budget) and
+any CategoryBudget limits. An alert is enqueued only when a scope crosses a
+threshold in BUDGET_ALERT_THRESHOLDS that it had not reached before this
+month. Each evaluation reads a handful of rows, however large the month is.
+"""
+from decimal import Decimal
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.timezone import localdate, now
+
+from .budget import monthly_category_totals
+from .models import BudgetAlertState, CategoryBudget
+from .rollups import month_start
+from .tasks import send_budget_alert_email_task
+
+
+def get_thresholds():
+    return sorted(getattr(settings, 'BUDGET_ALERT_THRESHOLDS', [100]))
+
+
+def highest_crossed(spent, limit, thresholds):
+    if not limit or limit <= 0:
+        return 0
+    percent = spent * 100 / limit
+    return max((t for t in thresholds if percent >= t), default=0)
+
+
+def _advance_state(user, month, scope, threshold):
+    """
+    Record ``threshold`` for the scope if it is higher than what was already sent.
+
+    The conditional UPDATE (or the unique key on insert) lets exactly one
+    concurrent writer win, so the same crossing never alerts twice.
+    """
+    updated = BudgetAlertState.objects.filter(
+        user=user, month=month, scope=scope, threshold__lt=threshold
+    ).update(threshold=threshold, updated_at=now())
+    if updated:
+        return True
+
+    try:
+        with transaction.atomic():
+            BudgetAlertState.objects.create(user=user, month=month, scope=scope, threshold=threshold)
+        return True
+    except IntegrityError:
+        # A row exists with this threshold or a higher one
+        return False
+
+
+def _budget_scopes(user, month, user_profile=None):
+    """
+    (scope, spent this month, limit) for the overall budget, when
+    ``user_profile`` is given, and each category limit.
+    """
+    spent_by_category = monthly_category_totals(user, month)
+
+    scopes = []
+    if user_profile is not None:
+        scopes.append((BudgetAlertState.OVERALL, sum(spent_by_category.values(), Decimal('0')), user_profile.monthly_budget))
+    for category, limit in CategoryBudget.objects.filter(user=user).values_list('category', 'monthly_limit'):
+        scopes.append((category, spent_by_category.get(category, Decimal('0')), limit))
+    return scopes
+
+
+def evaluate_budget_alerts(user, user_profile=None):
+    """
+    Enqueue one alert per scope that newly crossed a threshold this month.
+    Returns the list of (scope, threshold) alerts that were sent.
+    """
+    month = month_start(localdate())
+    thresholds = get_thresholds()
+
+    sent = []
+    for scope, spent, limit in _budget_scopes(user, month, user_profile):
+        threshold = highest_crossed(spent, limit, thresholds)
+        if threshold and _advance_state(user, month, scope, threshold):
+            # Callers may be inside a transaction that can still roll the state back
+            transaction.on_commit(partial(
+                send_budget_alert_email_task.delay,
+                user.email,
+                user.username,
+                spent,
+                limit,
+                threshold=threshold,
+                category=None if scope == BudgetAlertState.OVERALL else scope,
+            ))
+            sent.append((scope, threshold))
+    return sent
+
+
+def rearm_budget_alerts(user, scopes):
+    """
+    Call after the limits of ``scopes`` change. This month's alert state for
+    each is lowered to the threshold already crossed under its new limit, so
+    a raised limit alerts again as spend reaches it. Scopes left without a
+    limit, or below every threshold, are cleared.
+    """
+    from users.models import UserProfile
+
+    month = month_start(localdate())
+    thresholds = get_thresholds()
+    user_profile = UserProfile.objects.filter(user=user).first()
+    crossed = {
+        scope: highest_crossed(spent, limit, thresholds)
+        for scope, spent, limit in _budget_scopes(user, month, user_profile)
+    }
+
+    for state in BudgetAlertState.objects.filter(user=user, month=month, scope__in=list(scopes)):
+        threshold = crossed.get(state.scope, 0)
+        if not threshold:
+            state.delete()
+        elif threshold < state.threshold:
+            state.threshold = threshold
+            state.save(update_fields=['threshold', 'updated_at'])
@@ -0,0 +1,219 @@
+"""
+Flag unusually large expenses against the user's own history for the category.
+
+Each (user, category) keeps a SpendBaseline: its last ANOMALY_WINDOW_SIZE
+amounts, each tagged with its expense id. A nightly run reads only the expenses created or edited since the
+previous run. It scores each one against its baseline's median and MAD
+(median absolute deviation), then appends it to the window, so history is
+never rescanned. Baselines are scored as a NaN-padded matrix, one row per
+(user, category), in chunks of users.
+
+An expense is flagged when its robust z-score, (amount - median) /
+(1.4826 * MAD), exceeds ANOMALY_THRESHOLD and the baseline holds at least
+ANOMALY_MIN_HISTORY amounts. The scale is floored at a tenth of the median,
+so a category with near-identical amounts (rent, subscriptions) does not
+flag every small change. Only amounts above the median are flagged.
+
+An edited expense is re-scored against its windows without its old amount,
+then replaces it, in its new category's window if it moved. Deleted expenses
+leave their windows too, so saving or moving an expense never stacks copies
+of it into a baseline. The first run seeds baselines from the last
+ANOMALY_BOOTSTRAP_DAYS without flagging anything, since there is nothing to
+compare against yet.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils.timezone import now
+
+from server import lazy
+from .models import Expense, ExpenseAnomaly, ExpenseTombstone, SpendBaseline
+
+MAD_TO_SIGMA = 1.4826
+MIN_SCALE_OF_MEDIAN = 0.1
+
+
+def _setting(name, default):
+    return getattr(settings, f"ANOMALY_{name}", default)
+
+
+def load_window(baseline):
+    """
+    (expense ids, amounts) of a baseline's window, oldest first.
+    """
+    np = lazy.get('numpy')
+    amounts = np.frombuffer(bytes(baseline.amounts), dtype='<f8')
+    ids = np.frombuffer(bytes(baseline.expense_ids), dtype='<i8')
+    if len(ids) < len(amounts):
+        # Windows written before ids were kept; id 0 matches no expense
+        ids = np.concatenate([np.zeros(len(amounts) - len(ids), dtype='<i8'), ids])
+    return ids, amounts
+
+
+def dump_window(baseline, ids, amounts):
+    baseline.expense_ids = ids.astype('<i8').tobytes()
+    baseline.amounts = amounts.astype('<f8').tobytes()
+
+
+def _forget(windows, expense_ids):
+    """
+    Drop ``expense_ids`` from ``windows`` ({group: (ids, amounts)}) in place;
+    returns the groups whose window changed.
+    """
+    np = lazy.get('numpy')
+    changed = set()
+    for group, (ids, amounts) in windows.items():
+        keep = ~np.isin(ids, expense_ids)
+        if not keep.all():
+            windows[group] = (ids[keep], amounts[keep])
+            changed.add(group)
+    return changed
+
+
+def robust_baselines(windows):
+    """
+    (median, scale, ready) arrays for a list of 1-D amount windows. ``ready``
+    marks windows long enough to score against.
+    """
+    np = lazy.get('numpy')
+    lengths = np.array([len(window) for window in windows])
+    padded = np.full((len(windows), max(lengths.max(initial=0), 1)), np.nan)
+    for i, window in enumerate(windows):
+        padded[i, :len(window)] = window
+
+    ready = lengths >= _setting('MIN_HISTORY', 8)
+    median = np.zeros(len(windows))
+    mad = np.zeros(len(windows))
+    if ready.any():
+        median[ready] = np.nanmedian(padded[ready], axis=1)
+        mad[ready] = np.nanmedian(np.abs(padded[ready] - median[ready, None]), axis=1)
+    scale = np.maximum(np.maximum(MAD_TO_SIGMA * mad, MIN_SCALE_OF_MEDIAN * median), 0.01)
+    return median, scale, ready
+
+
+def _scan_users(changes, user_ids, settled):
+    """
+    Score and fold in the changed expenses of ``user_ids``. Returns how many were flagged.
+    """
+    np = lazy.get('numpy')
+    rows = list(
+        changes.filter(user_id__in=user_ids).values_list('id', 'user_id', 'category', 'amount')
+    )
+    if not rows:
+        return 0
+
+    baselines = {
+        (baseline.user_id, baseline.category): baseline
+        for baseline in SpendBaseline.objects.filter(user_id__in=user_ids)
+    }
+    # An edited expense is scored without its old amount, wherever that was
+    windows = {group: load_window(baseline) for group, baseline in baselines.items()}
+    dirty = _forget(windows, np.array([row[0] for row in rows]))
+
+    groups = sorted({(user_id, category) for _, user_id, category, _ in rows})
+    position = {group: i for i, group in enumerate(groups)}
+    empty = (np.empty(0, dtype='<i8'), np.empty(0))
+    median, scale, ready = robust_baselines([windows.get(group, empty)[1] for group in groups])
+
+    group_of = np.array([position[(user_id, category)] for _, user_id, category, _ in rows])
+    amounts = np.array([float(amount) for *_, amount in rows])
+    scores = (amounts - median[group_of]) / scale[group_of]
+    flagged = np.flatnonzero(ready[group_of] & (scores > _setting('THRESHOLD', 5.0)))
+
+    ExpenseAnomaly.objects.filter(expense_id__in=[row[0] for row in rows]).delete()
+    ExpenseAnomaly.objects.bulk_create([
+        ExpenseAnomaly(
+            user_id=rows[i][1],
+            expense_id=rows[i][0],
+            category=rows[i][2],
+            amount=rows[i][3],
+            baseline_median=round(median[group_of[i]], 2),
+            score=round(float(scores[i]), 2),
+        )
+        for i in flagged
+    ])
+
+    new_rows = defaultdict(list)
+    for (expense_id, *_), group, amount in zip(rows, group_of, amounts):
+        new_rows[groups[group]].append((expense_id, amount))
+    size = _setting('WINDOW_SIZE', 100)
+    created = []
+    for group, added in new_rows.items():
+        ids, window = windows.get(group, empty)
+        added_ids, added_amounts = zip(*added)
+        ids = np.concatenate([ids, np.array(added_ids, dtype='<i8')])[-size:]
+        window = np.concatenate([window, np.array(added_amounts)])[-size:]
+        if group in baselines:
+            windows[group] = (ids, window)
+            dirty.add(group)
+        else:
+            baseline = SpendBaseline(user_id=group[0], category=group[1], scanned_through=settled)
+            dump_window(baseline, ids, window)
+            created.append(baseline)
+
+    for group in dirty:
+        dump_window(baselines[group], *windows[group])
+        baselines[group].scanned_through = settled
+    SpendBaseline.objects.bulk_update(
+        [baselines[group] for group in dirty], ['amounts', 'expense_ids', 'scanned_through']
+    )
+    SpendBaseline.objects.bulk_create(created)
+    return len(flagged)
+
+
+def _forget_deleted(deleted):
+    """
+    Take deleted expenses out of their windows; ``deleted`` is (user_id, expense_id) pairs.
+    """
+    np = lazy.get('numpy')
+    deleted = list(deleted)
+    if not deleted:
+        return
+
+    baselines = {
+        (baseline.user_id, baseline.category): baseline
+        for baseline in SpendBaseline.objects.filter(user_id__in={user_id for user_id, _ in deleted})
+    }
+    windows = {group: load_window(baseline) for group, baseline in baselines.items()}
+    changed = _forget(windows, np.array([expense_id for _, expense_id in deleted]))
+    for group in changed:
+        dump_window(baselines[group], *windows[group])
+    SpendBaseline.objects.bulk_update([baselines[group] for group in changed], ['amounts', 'expense_ids'])
+
+
+def detect_anomalies(batch_size=500):
+    """
+    Fold every expense change since the last run into the baselines, flagging
+    outliers on the way. Returns (users scanned, expenses flagged).
+
+    The run is one transaction, so a failure leaves the previous run's
+    watermark in place and the next run repeats the work rather than skipping it.
+    """
+    settled = now() - timedelta(seconds=getattr(settings, "EXPENSE_CHANGES_SETTLE_SECONDS", 5))
+    watermark = SpendBaseline.objects.aggregate(watermark=Max('scanned_through'))['watermark']
+
+    changes = Expense.objects.filter(updated_at__lte=settled)
+    if watermark:
+        changes = changes.filter(updated_at__gt=watermark).order_by('updated_at', 'id')
+    else:
+        since = settled.date() - timedelta(days=_setting('BOOTSTRAP_DAYS', 365))
+        changes = changes.filter(date__gte=since).order_by('date', 'id')
+
+    user_ids = iter(changes.values_list('user_id', flat=True).distinct().order_by('user_id'))
+    users = flagged = 0
+    with transaction.atomic():
+        while batch := list(islice(user_ids, batch_size)):
+            flagged += _scan_users(changes, batch, settled)
+            users += len(batch)
+
+        if watermark:
+            deleted = ExpenseTombstone.objects.filter(deleted_at__gt=watermark, deleted_at__lte=settled)
+            ExpenseAnomaly.objects.filter(expense_id__in=deleted.values('expense_id')).delete()
+            _forget_deleted(deleted.values_list('user_id', 'expense_id'))
+
+    return users, flagged
+
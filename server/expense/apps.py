@@ -1,6 +1,52 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+import json
 
 
 class ExpenseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'expense'
+
+    def ready(self):
+        # Keep the spend rollups in step with every Expense write
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(self.setup_periodic_tasks, sender=self)
+
+    def setup_periodic_tasks(self, sender, **kwargs):
+
+        from django_celery_beat.models import PeriodicTask, IntervalSchedule
+
+        schedule, created = IntervalSchedule.objects.get_or_create(
+            every=1,
+            period=IntervalSchedule.DAYS,
+        )
+
+        # A no-op until expense_expense has been partitioned
+        PeriodicTask.objects.get_or_create(
+            interval=schedule,
+            name='Ensure Expense Partitions Daily',
+            task='expense.tasks.ensure_expense_partitions',
+            defaults={'kwargs': json.dumps({})}
+        )
+
+        PeriodicTask.objects.get_or_create(
+            interval=schedule,
+            name='Purge Expense Tombstones Daily',
+            task='expense.tasks.purge_expense_tombstones',
+            defaults={'kwargs': json.dumps({})}
+        )
+
+        PeriodicTask.objects.get_or_create(
+            interval=schedule,
+            name='Reconcile Spend Rollups Daily',
+            task='expense.tasks.reconcile_spend_rollups',
+            defaults={'kwargs': json.dumps({})}
+        )
+
+        PeriodicTask.objects.get_or_create(
+            interval=schedule,
+            name='Detect Spend Anomalies Daily',
+            task='expense.tasks.detect_spend_anomalies',
+            defaults={'kwargs': json.dumps({})}
+        )
@@ -0,0 +1,11 @@
+from django.utils.timezone import localdate
+
+from .models import MonthlyUserSpend
+from .rollups import month_start
+
+
+def monthly_category_totals(user, month=None):
+    month = month_start(month or localdate())
+    return dict(
+        MonthlyUserSpend.objects.filter(user=user, month=month).values_list('category', 'total')
+    )
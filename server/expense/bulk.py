@@ -0,0 +1,86 @@
+"""
+Set-based updates and deletes of a user's expenses.
+
+Both run as one UPDATE / one DELETE over ``id IN (...) AND user_id = ...``
+inside a transaction. Save/delete signals don't fire for these, so the rows
+are read once under SELECT ... FOR UPDATE first and the rollups get the
+matching batch of changes. The same goes for updated_at and the deletion
+tombstones the change feed reads.
+"""
+from django.db import models, transaction
+from django.utils.timezone import now
+
+from .models import Expense, ExpenseTombstone
+from .rollups import ExpenseRow, apply_expense_changes
+
+# Fields a bulk patch may change; none of them feed the import fingerprint
+BULK_PATCH_FIELDS = ('category', 'payment_method')
+
+_ROW_COLUMNS = ('id', *ExpenseRow._fields)
+
+
+def _lock_rows(user, ids):
+    rows = (
+        Expense.objects.filter(user=user, id__in=ids)
+        .select_for_update()
+        .values_list(*_ROW_COLUMNS)
+    )
+    return {row[0]: ExpenseRow(*row[1:]) for row in rows}
+
+
+def bulk_update_expenses(user, ids, patch):
+    """
+    Apply ``patch`` to the user's expenses in ``ids``; returns the ids updated.
+    """
+    patch = {field: value for field, value in patch.items() if field in BULK_PATCH_FIELDS}
+
+    with transaction.atomic():
+        before = _lock_rows(user, ids)
+        if not before or not patch:
+            return list(before)
+
+        Expense.objects.filter(user=user, id__in=list(before)).update(**patch, updated_at=now())
+        apply_expense_changes((old, old._replace(**patch)) for old in before.values())
+
+    return list(before)
+
+
+def _clear_references(ids):
+    """
+    Do what the delete collector would for rows pointing at these expenses.
+    Only SET_NULL and CASCADE are supported; any other on_delete raises
+    rather than being bypassed.
+    """
+    for relation in Expense._meta.related_objects:
+        on_delete = relation.on_delete
+        if on_delete not in (models.SET_NULL, models.CASCADE):
+            raise RuntimeError(
+                f"Bulk expense delete can't honour on_delete={on_delete.__name__} "
+                f"on {relation.related_model.__name__}.{relation.field.name}"
+            )
+        related = relation.related_model._base_manager.filter(**{f"{relation.field.name}__in": ids})
+        if on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+        else:
+            related.delete()
+
+
+def bulk_delete_expenses(user, ids):
+    """
+    Delete the user's expenses in ``ids``; returns the ids deleted.
+    """
+    with transaction.atomic():
+        before = _lock_rows(user, ids)
+        if not before:
+            return []
+
+        _clear_references(list(before))
+        # One DELETE, with references already cleared above and no per-row signals
+        queryset = Expense.objects.filter(user=user, id__in=list(before))
+        queryset._raw_delete(queryset.db)
+        apply_expense_changes((old, None) for old in before.values())
+        ExpenseTombstone.objects.bulk_create(
+            [ExpenseTombstone(user=user, expense_id=expense_id) for expense_id in before]
+        )
+
+    return list(before)
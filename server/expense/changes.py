@@ -0,0 +1,111 @@
+"""
+Change feed for clients that keep a local copy of their expenses.
+
+Returns the expenses created or updated, plus tombstones for the ones
+deleted, after a cursor. Both streams are read in (timestamp, id) order off
+their (user, timestamp, id) indexes and merged. Updates sort before deletes
+at the same instant.
+
+Timestamps are taken when the write happens, not at commit. Only changes
+older than EXPENSE_CHANGES_SETTLE_SECONDS are served, so a transaction that
+commits a moment late is not skipped by a cursor that has already moved past
+it.
+"""
+import base64
+from datetime import datetime, timedelta
+from heapq import merge
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.timezone import now
+
+from .models import Expense, ExpenseTombstone
+from .pagination import InvalidCursor
+
+UPDATED, DELETED = 0, 1
+
+
+class CursorExpired(Exception):
+    """The cursor predates the tombstone retention window; the client must resync."""
+
+
+def encode_change_cursor(timestamp, kind, row_id):
+    raw = f"{timestamp.isoformat()}|{kind}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_change_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, kind, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        timestamp, kind = datetime.fromisoformat(timestamp), int(kind)
+        if timestamp.tzinfo is None or kind not in (UPDATED, DELETED):
+            raise ValueError
+        return timestamp, kind, int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor.")
+
+
+def tombstone_horizon():
+    return now() - timedelta(days=getattr(settings, "EXPENSE_TOMBSTONE_RETENTION_DAYS", 90))
+
+
+def expense_changes(user, columns, cursor=None, limit=500):
+    """
+    Up to ``limit`` changes after ``cursor``.
+
+    Returns (updated rows as ``columns`` tuples, deleted expense ids,
+    next cursor, has_more). Clients apply the updates before the deletes.
+    Without a cursor the feed starts from the beginning, which doubles as the
+    initial sync.
+    """
+    settled = now() - timedelta(seconds=getattr(settings, "EXPENSE_CHANGES_SETTLE_SECONDS", 5))
+    updates = Expense.objects.filter(user=user, updated_at__lte=settled)
+    deletes = ExpenseTombstone.objects.filter(user=user, deleted_at__lte=settled)
+
+    if cursor:
+        since, kind, last_id = decode_change_cursor(cursor)
+        if since < tombstone_horizon():
+            raise CursorExpired("Cursor is older than the tombstone retention window; resync from scratch.")
+        if kind == UPDATED:
+            updates = updates.filter(updated_at__gte=since).filter(Q(updated_at__gt=since) | Q(id__gt=last_id))
+            deletes = deletes.filter(deleted_at__gte=since)
+        else:
+            updates = updates.filter(updated_at__gt=since)
+            deletes = deletes.filter(deleted_at__gte=since).filter(Q(deleted_at__gt=since) | Q(id__gt=last_id))
+
+    updated_rows = (
+        (timestamp, UPDATED, expense_id, row)
+        for timestamp, expense_id, *row in updates.order_by("updated_at", "id").values_list(
+            "updated_at", "id", *columns
+        )[:limit + 1]
+    )
+    deleted_rows = (
+        (timestamp, DELETED, tombstone_id, expense_id)
+        for timestamp, tombstone_id, expense_id in deletes.order_by("deleted_at", "id").values_list(
+            "deleted_at", "id", "expense_id"
+        )[:limit + 1]
+    )
+    changes = list(merge(updated_rows, deleted_rows, key=lambda change: change[:3]))
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    updated = [payload for _, kind, _, payload in changes if kind == UPDATED]
+    deleted = [payload for _, kind, _, payload in changes if kind == DELETED]
+
+    if has_more:
+        next_cursor = encode_change_cursor(*changes[-1][:3])
+    else:
+        # Caught up: move the cursor to the settle point so it never ages out
+        # while the user simply isn't changing anything
+        next_cursor = encode_change_cursor(settled, DELETED, 0)
+
+    return updated, deleted, next_cursor, has_more
+
+
+def purge_tombstones():
+    """
+    Drop tombstones past the retention window. Returns how many were deleted.
+    """
+    deleted, _ = ExpenseTombstone.objects.filter(deleted_at__lt=tombstone_horizon()).delete()
+    return deleted
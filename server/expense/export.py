@@ -0,0 +1,35 @@
+import csv
+import json
+
+EXPORT_FIELDS = ['id', 'date', 'amount', 'category', 'payment_method', 'description']
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+    def write(self, value):
+        return value
+
+
+def _rows(queryset):
+    # iterator() streams through a server-side cursor instead of caching the result set
+    return queryset.order_by('date', 'id').values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in _rows(queryset):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(queryset):
+    for expense_id, day, amount, category, payment_method, description in _rows(queryset):
+        yield json.dumps({
+            'id': expense_id,
+            'date': day.isoformat(),
+            'amount': str(amount),
+            'category': category,
+            'payment_method': payment_method,
+            'description': description,
+        }) + '\n'
@@ -0,0 +1,32 @@
+from datetime import date
+
+
+def parse_date_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a date in YYYY-MM-DD format.")
+
+
+def filter_expenses(queryset, params):
+    """
+    Narrow an Expense queryset by the ?from=, ?to= (inclusive) and ?category=
+    query parameters. Raises ValueError on malformed input.
+    """
+    start = parse_date_param(params, "from")
+    end = parse_date_param(params, "to")
+    if start and end and start > end:
+        raise ValueError("'from' must not be after 'to'.")
+
+    if start:
+        queryset = queryset.filter(date__gte=start)
+    if end:
+        queryset = queryset.filter(date__lte=end)
+
+    categories = [c for c in params.getlist("category") if c]
+    if categories:
+        queryset = queryset.filter(category__in=categories)
+    return queryset
@@ -0,0 +1,109 @@
+"""
+Idempotency-Key support for write endpoints that clients retry.
+
+The first request with a given key runs the view and stores its response
+in the shared cache for IDEMPOTENCY_KEY_TTL seconds. A retry with the same
+key and body gets that stored response back, marked with
+``Idempotent-Replayed: true``, and the view does not run again. A retry that
+arrives while the first request is still running waits on a cache lock for
+the stored response, so the view never runs twice for the same key.
+Responses with a 5xx status are not stored, so those requests can be retried.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from server import locks
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.1
+
+
+def _request_fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path} {body}".encode()).hexdigest()
+
+
+def _replay(record, fingerprint):
+    if record["fingerprint"] != fingerprint:
+        return Response(
+            {"error": f"This {HEADER} was already used with a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(record["data"], status=record["status"])
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(scope):
+    """
+    Make a DRF function view replay its first response for a repeated
+    Idempotency-Key. Apply it below @api_view/@permission_classes, so it runs
+    after authentication. It only acts on POST requests that carry the header.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if request.method != "POST" or not key:
+                return view(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            digest = hashlib.sha256(key.encode()).hexdigest()
+            response_key = f"idempotency:{scope}:{request.user.pk}:{digest}"
+            lock_key = f"{response_key}:lock"
+            ttl = getattr(settings, "IDEMPOTENCY_KEY_TTL", 24 * 60 * 60)
+            lock_timeout = getattr(settings, "IDEMPOTENCY_LOCK_TIMEOUT", 30)
+            fingerprint = _request_fingerprint(request)
+
+            record = cache.get(response_key)
+            if record is not None:
+                return _replay(record, fingerprint)
+
+            token = locks.acquire(lock_key, lock_timeout)
+            if token is None:
+                # Another request with this key is running; wait for its response
+                deadline = time.monotonic() + lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(POLL_INTERVAL)
+                    record = cache.get(response_key)
+                    if record is not None:
+                        return _replay(record, fingerprint)
+                    if cache.get(lock_key) is None:
+                        break
+                return Response(
+                    {"error": f"A request with this {HEADER} is still in progress or failed; retry shortly."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+            try:
+                # The first holder may have finished between our get and add
+                record = cache.get(response_key)
+                if record is not None:
+                    return _replay(record, fingerprint)
+
+                response = view(request, *args, **kwargs)
+                if response.status_code < 500:
+                    cache.set(
+                        response_key,
+                        {"fingerprint": fingerprint, "status": response.status_code, "data": response.data},
+                        timeout=ttl,
+                    )
+                return response
+            finally:
+                # Only our own lock; if the view outlived it, a later request may hold it now
+                locks.release(lock_key, token)
+
+        return wrapper
+    return decorator
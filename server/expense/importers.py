@@ -0,0 +1,192 @@
+"""
+Streaming parsers for bank statement files.
+
+Each parser yields ``(line_number, record)`` pairs, where ``record`` is either a
+dict with amount/date/category/payment_method/description or an ImportRowError.
+Files are read incrementally, so memory does not grow with the statement.
+"""
+import csv
+import io
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from .models import Expense
+
+
+# Header names banks commonly use for each Expense field; column_map overrides these
+COLUMN_ALIASES = {
+    'amount': ['amount', 'debit', 'withdrawal', 'withdrawal amt.', 'withdrawal amount', 'debit amount', 'value'],
+    'date': ['date', 'transaction date', 'txn date', 'posted date', 'posting date', 'value date'],
+    'description': ['description', 'narration', 'details', 'particulars', 'memo', 'payee', 'remarks'],
+    'category': ['category'],
+    'payment_method': ['payment method', 'payment_method', 'mode', 'type'],
+}
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y', '%m/%d/%Y', '%Y/%m/%d', '%d %b %Y', '%d-%b-%Y']
+
+VALID_CATEGORIES = {key for key, _ in Expense.CATEGORIES}
+VALID_PAYMENT_METHODS = {key for key, _ in Expense.PAYMENT_METHODS}
+
+# OFX TRNTYPE values that map onto our payment methods
+OFX_PAYMENT_METHODS = {'POS': 'card', 'ATM': 'cash', 'CASH': 'cash'}
+
+
+class ImportRowError(Exception):
+    pass
+
+
+class SkipRow(Exception):
+    """Raised for rows that are valid but not expenses (credits, zero amounts)."""
+
+
+def parse_amount(value, debits_only=False):
+    if not (value or '').strip():
+        # Blank debit cell, e.g. a credit row in a two-column statement
+        raise SkipRow()
+
+    cleaned = re.sub(r'[^\d.\-()]', '', value)
+    negative = cleaned.startswith('-') or (cleaned.startswith('(') and cleaned.endswith(')'))
+    try:
+        amount = Decimal(cleaned.strip('()-'))
+    except InvalidOperation:
+        raise ImportRowError(f"Invalid amount {value!r}")
+
+    if amount == 0 or (debits_only and not negative):
+        raise SkipRow()
+    return amount.quantize(Decimal('0.01'))
+
+
+def parse_date(value, date_format=''):
+    value = (value or '').strip()
+    for fmt in ([date_format] if date_format else DATE_FORMATS):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ImportRowError(f"Unrecognised date {value!r}")
+
+
+def normalize_choice(value, valid):
+    value = (value or '').strip().lower()
+    return value if value in valid else 'other'
+
+
+def resolve_columns(headers, column_map):
+    """
+    Map each Expense field to the header holding it, preferring the explicit map.
+    """
+    by_lower = {h.strip().lower(): h for h in headers if h}
+    resolved = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        explicit = column_map.get(field)
+        if explicit:
+            if explicit not in headers:
+                raise ImportRowError(f"Column {explicit!r} mapped to {field} is not in the file")
+            resolved[field] = explicit
+            continue
+        for alias in aliases:
+            if alias in by_lower:
+                resolved[field] = by_lower[alias]
+                break
+
+    missing = {'amount', 'date'} - set(resolved)
+    if missing:
+        raise ImportRowError(f"Could not find a column for: {', '.join(sorted(missing))}")
+    return resolved
+
+
+def iter_csv(binary_file, column_map=None, date_format='', debits_only=False):
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        reader = csv.DictReader(text)
+        columns = resolve_columns(reader.fieldnames or [], column_map or {})
+
+        for row in reader:
+            line = reader.line_num
+            try:
+                yield line, {
+                    'amount': parse_amount(row.get(columns['amount']), debits_only),
+                    'date': parse_date(row.get(columns['date']), date_format),
+                    'description': (row.get(columns.get('description')) or '').strip(),
+                    'category': normalize_choice(row.get(columns.get('category')), VALID_CATEGORIES),
+                    'payment_method': normalize_choice(row.get(columns.get('payment_method')), VALID_PAYMENT_METHODS),
+                }
+            except SkipRow:
+                yield line, None
+            except ImportRowError as e:
+                yield line, e
+    finally:
+        # Hand the file back to the caller instead of closing it with the wrapper
+        text.detach()
+
+
+OFX_TAG = re.compile(r'<(\w+)>([^<\r\n]*)')
+OFX_BLOCK = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.IGNORECASE | re.DOTALL)
+OFX_READ_SIZE = 64 * 1024
+
+
+def _ofx_transaction(block):
+    fields = {tag.upper(): value.strip() for tag, value in OFX_TAG.findall(block)}
+
+    raw_amount = fields.get('TRNAMT', '')
+    # Statement credits are income, not expenses
+    if not raw_amount.startswith('-'):
+        raise SkipRow()
+
+    posted = fields.get('DTPOSTED', '')[:8]
+    try:
+        day = date(int(posted[:4]), int(posted[4:6]), int(posted[6:8]))
+    except ValueError:
+        raise ImportRowError(f"Unrecognised DTPOSTED {fields.get('DTPOSTED')!r}")
+
+    description = ' '.join(part for part in (fields.get('NAME', ''), fields.get('MEMO', '')) if part)
+    return {
+        'amount': parse_amount(raw_amount),
+        'date': day,
+        'description': description,
+        'category': 'other',
+        'payment_method': OFX_PAYMENT_METHODS.get(fields.get('TRNTYPE', '').upper(), 'other'),
+    }
+
+
+def iter_ofx(binary_file, **kwargs):
+    """
+    Parse <STMTTRN> blocks from OFX 1.x (SGML) or 2.x (XML) a read buffer at a time.
+
+    OFX files are often a single line, so records are numbered by transaction
+    rather than by line.
+    """
+    text = io.TextIOWrapper(binary_file, encoding='utf-8', errors='replace')
+    buffer = ''
+    number = 0
+
+    try:
+        while True:
+            block = text.read(OFX_READ_SIZE)
+            buffer += block
+            consumed = 0
+            for match in OFX_BLOCK.finditer(buffer):
+                number += 1
+                consumed = match.end()
+                try:
+                    yield number, _ofx_transaction(match.group(1))
+                except SkipRow:
+                    yield number, None
+                except ImportRowError as e:
+                    yield number, e
+            buffer = buffer[consumed:]
+            if not consumed:
+                # Keep only a possible partial transaction, not the header/footer noise
+                start = buffer.upper().rfind('<STMTTRN>')
+                buffer = buffer[start:] if start >= 0 else buffer[-len('<STMTTRN>'):]
+            if not block:
+                break
+    finally:
+        text.detach()
+
+
+PARSERS = {
+    'csv': iter_csv,
+    'ofx': iter_ofx,
+}
@@ -0,0 +1,66 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from expense.models import Expense
+from expense.serializers import ExpenseSerializer, ExpenseValuesSerializer
+
+
+def make_rows(count):
+    """Synthetic rows shaped like values_list(*ExpenseValuesSerializer.FIELDS)."""
+    rng = random.Random(42)
+    categories = [c for c, _ in Expense.CATEGORIES]
+    methods = [m for m, _ in Expense.PAYMENT_METHODS]
+    start = date(2020, 1, 1)
+    return [
+        (
+            i,
+            1,
+            Decimal(rng.randint(100, 500000)) / 100,
+            rng.choice(categories),
+            start + timedelta(days=rng.randint(0, 2000)),
+            f"expense {i}",
+            rng.choice(methods),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = "Compare ExpenseSerializer(many=True) with the values() fast path (serialization only, no database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        fields = ExpenseValuesSerializer.FIELDS
+        fast = ExpenseValuesSerializer()
+        sparse = ExpenseValuesSerializer(["id", "amount", "date"])
+
+        self.stdout.write(f"{'rows':>8}  {'DRF (s)':>9}  {'fast (s)':>9}  {'sparse (s)':>10}  {'speedup':>7}")
+        for size in options["sizes"]:
+            rows = make_rows(size)
+            instances = [
+                Expense(**{ExpenseValuesSerializer.SOURCES.get(f, f): v for f, v in zip(fields, row)})
+                for row in rows
+            ]
+            sparse_rows = [(row[0], row[2], row[4]) for row in rows]
+
+            drf = best_of(options["repeat"], lambda: ExpenseSerializer(instances, many=True).data)
+            values = best_of(options["repeat"], lambda: fast.serialize(rows))
+            narrow = best_of(options["repeat"], lambda: sparse.serialize(sparse_rows))
+
+            self.stdout.write(f"{size:>8}  {drf:>9.3f}  {values:>9.3f}  {narrow:>10.3f}  {drf / values:>6.1f}x")
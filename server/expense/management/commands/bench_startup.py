@@ -0,0 +1,70 @@
+import json
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from server.lazy import HEAVY_MODULES
+
+
+# Runs in a fresh interpreter so nothing is already imported
+PROBE = r"""
+import json, os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+started = time.perf_counter()
+if sys.argv[1] == "wsgi":
+    import server.wsgi
+    from django.urls import get_resolver
+    get_resolver().url_patterns  # imports every view module, as the first request would
+else:
+    from server.celery import app
+    app.loader.import_default_modules()  # imports every app's tasks, as a worker does at boot
+elapsed = time.perf_counter() - started
+with open("/proc/self/status") as status:
+    rss_kb = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+heavy = json.loads(sys.argv[2])
+print(json.dumps({"seconds": elapsed, "rss_kb": rss_kb, "heavy": [m for m in heavy if m in sys.modules]}))
+"""
+
+TARGETS = ("wsgi", "celery")
+
+
+class Command(BaseCommand):
+    help = "Measure import time and RSS of server.wsgi and the Celery worker, and list heavy modules they load eagerly."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--json", action="store_true", help="Print machine-readable results.")
+        parser.add_argument("--fail-on-heavy", action="store_true", help="Exit non-zero if a heavy module is imported at start-up.")
+
+    def probe(self, target):
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE, target, json.dumps(HEAVY_MODULES)],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"{target} failed to start:\n{result.stderr}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        results = {}
+        for target in TARGETS:
+            runs = [self.probe(target) for _ in range(options["repeat"])]
+            results[target] = {
+                "seconds": statistics.median(run["seconds"] for run in runs),
+                "rss_mib": max(run["rss_kb"] for run in runs) / 1024,
+                "heavy": runs[0]["heavy"],
+            }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results))
+        else:
+            self.stdout.write(f"{'target':<8}  {'import (s)':>10}  {'RSS (MiB)':>9}  eager heavy modules")
+            for target, result in results.items():
+                heavy = ", ".join(result["heavy"]) or "-"
+                self.stdout.write(f"{target:<8}  {result['seconds']:>10.3f}  {result['rss_mib']:>9.1f}  {heavy}")
+
+        if options["fail_on_heavy"] and any(result["heavy"] for result in results.values()):
+            raise CommandError("Heavy modules are imported at start-up; load them through server.lazy.")
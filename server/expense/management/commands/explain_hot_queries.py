@@ -0,0 +1,108 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.utils.timezone import now
+
+from expense.models import Expense, MonthlyUserSpend
+from expense.partitioning import TABLE, is_partitioned, list_partitions
+from expense.rollups import month_start
+from expense_scheduler.models import ExpenseSchedule
+from split.models import ExpenseSplit
+
+
+SEQ_SCAN = re.compile(r"Seq Scan on (\S+)")
+# Relation scans on expense_expense partitions, e.g. "Index Scan using ... on expense_expense_y2025".
+# "Bitmap Index Scan on ..." names an index, which Postgres prefixes with the partition name.
+PARTITION_SCAN = re.compile(
+    rf"(?<!Bitmap )\b(?:Seq|Index|Index Only|Bitmap Heap) Scan(?: Backward)?(?: using \S+)? on ({TABLE}_\w+)"
+)
+
+
+def hot_queries(user):
+    """
+    The query shapes the views actually run, as (label, queryset) pairs.
+    """
+    today = now().date()
+    start_of_month = today.replace(day=1)
+    next_month = month_start(start_of_month + timedelta(days=31))
+    expenses = Expense.objects.filter(user=user)
+
+    return [
+        ("expense_list: first page",
+         expenses.order_by("-date", "-id")[:51]),
+        ("expense_list: budget month total",
+         MonthlyUserSpend.objects.filter(user=user, month=start_of_month)),
+        ("expense_list: category in month",
+         expenses.filter(category="food", date__gte=start_of_month)),
+        ("budget: month rebuild",
+         expenses.filter(date__gte=start_of_month, date__lt=next_month)
+         .values("category").annotate(total=Sum("amount"))),
+        ("analytics: summary rows",
+         expenses.values("date", "category", "amount")),
+        ("analytics: current month total",
+         expenses.filter(date__gte=start_of_month, date__lt=today + timedelta(days=1))
+         .values("user").annotate(total=Sum("amount"))),
+        ("analytics: trailing year",
+         expenses.filter(date__gte=today - timedelta(days=365)).values("date", "category", "amount")),
+        ("split: user splits",
+         ExpenseSplit.objects.filter(user=user)),
+        ("split: user splits by status",
+         ExpenseSplit.objects.filter(user=user, status=ExpenseSplit.Status.PENDING)),
+        ("scheduler: due schedules",
+         ExpenseSchedule.objects.filter(is_active=True, start_date__lte=today)
+         .filter(Q(next_occurrence__lte=today) | Q(next_occurrence__isnull=True))),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN for the hot view queries and report the ones that still seq-scan."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="User id to explain for (default: the user with most expenses).")
+        parser.add_argument("--analyze", action="store_true", help="Use EXPLAIN ANALYZE (executes the queries).")
+        parser.add_argument("--verbose-plans", action="store_true", help="Print every plan, not just the offenders.")
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["user"])
+        explain_options = {"analyze": True} if options["analyze"] else {}
+        is_postgres = connection.vendor == "postgresql"
+        partitions = {p.name for p in list_partitions()} if is_postgres and is_partitioned() else set()
+
+        offenders = 0
+        for label, queryset in hot_queries(user):
+            plan = queryset.explain(**explain_options)
+            seq_scans = SEQ_SCAN.findall(plan) if is_postgres else []
+
+            if seq_scans:
+                offenders += 1
+                self.stdout.write(self.style.WARNING(f"SEQ SCAN  {label}  ({', '.join(sorted(set(seq_scans)))})"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"OK        {label}"))
+
+            touched = sorted(set(PARTITION_SCAN.findall(plan)) & partitions)
+            if touched:
+                # Pruning: a date-bounded query should only reach the partitions its range covers
+                self.stdout.write(f"          partitions {len(touched)}/{len(partitions)}: {', '.join(touched)}")
+
+            if seq_scans or options["verbose_plans"]:
+                self.stdout.write(plan + "\n")
+
+        if not is_postgres:
+            self.stdout.write(self.style.NOTICE("Seq-scan detection only works on PostgreSQL plans."))
+        self.stdout.write(f"{offenders} queries still seq-scan.")
+
+    def get_user(self, user_id):
+        if user_id is not None:
+            try:
+                return User.objects.get(id=user_id)
+            except User.DoesNotExist:
+                raise CommandError(f"User {user_id} does not exist.")
+
+        user = User.objects.annotate(n=Count("expense")).order_by("-n").first()
+        if user is None:
+            raise CommandError("No users to explain queries for.")
+        return user
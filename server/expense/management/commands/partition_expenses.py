@@ -0,0 +1,75 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from expense.partitioning import (
+    INTERVALS, PartitioningError, convert_to_partitioned, detach_partitions, ensure_partitions,
+    is_partitioned, list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = "Convert expense_expense to a date-range partitioned table and manage its partitions."
+
+    def add_arguments(self, parser):
+        subcommands = parser.add_subparsers(dest="action", required=True)
+
+        subcommands.add_parser("list", help="Show the partitions and their bounds.")
+
+        convert = subcommands.add_parser("convert", help="Rebuild the table as partitioned and copy the rows in.")
+        convert.add_argument("--interval", choices=INTERVALS, help="Defaults to EXPENSE_PARTITION_INTERVAL.")
+        convert.add_argument("--ahead", type=int, help="Future partitions to create (default EXPENSE_PARTITIONS_AHEAD).")
+        convert.add_argument("--keep-legacy", action="store_true", help="Keep the old table as expense_expense_unpartitioned.")
+
+        ensure = subcommands.add_parser("ensure", help="Create missing partitions up to --ahead intervals from today.")
+        ensure.add_argument("--ahead", type=int)
+
+        detach = subcommands.add_parser("detach", help="Detach partitions that end on or before --before.")
+        detach.add_argument("--before", type=date.fromisoformat, required=True, help="YYYY-MM-DD")
+        target = detach.add_mutually_exclusive_group()
+        target.add_argument("--archive-schema", help="Move detached partitions into this schema.")
+        target.add_argument("--drop", action="store_true", help="Drop detached partitions (their rows are deleted).")
+
+    def handle(self, *args, **options):
+        try:
+            getattr(self, f"handle_{options['action']}")(options)
+        except PartitioningError as e:
+            raise CommandError(str(e))
+
+    def handle_list(self, options):
+        if not is_partitioned():
+            self.stdout.write("expense_expense is not partitioned.")
+            return
+        for partition in list_partitions():
+            bounds = f"{partition.start} .. {partition.end}" if partition.start else "DEFAULT"
+            self.stdout.write(f"{partition.name:<32} {bounds}")
+
+    def handle_convert(self, options):
+        created = convert_to_partitioned(
+            interval=options["interval"], ahead=options["ahead"],
+            keep_legacy=options["keep_legacy"], log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f"expense_expense is now partitioned ({len(list_partitions())} partitions)."))
+        if created:
+            self.stdout.write(f"Created ahead: {', '.join(created)}")
+        self.stdout.write(self.style.WARNING(
+            "Django's migration state still describes the unpartitioned table (primary key id, foreign keys "
+            "into it). Future Expense migrations must use plain AddIndex, not AddIndexConcurrently, and must "
+            "not add foreign keys to Expense; references are now enforced by triggers."
+        ))
+
+    def handle_ensure(self, options):
+        if not is_partitioned():
+            raise CommandError("expense_expense is not partitioned; run `partition_expenses convert` first.")
+        created = ensure_partitions(ahead=options["ahead"])
+        self.stdout.write(f"Created: {', '.join(created)}" if created else "Partitions up to date.")
+
+    def handle_detach(self, options):
+        if not is_partitioned():
+            raise CommandError("expense_expense is not partitioned.")
+        detached = detach_partitions(options["before"], archive_schema=options["archive_schema"], drop=options["drop"])
+        if not detached:
+            self.stdout.write("No partitions end on or before that date.")
+            return
+        verb = "Dropped" if options["drop"] else f"Moved to {options['archive_schema']}" if options["archive_schema"] else "Detached"
+        self.stdout.write(self.style.SUCCESS(f"{verb}: {', '.join(detached)}"))
@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError
+
+from expense.rollups import reconcile_user_rollups
+
+
+class Command(BaseCommand):
+    help = "Compare the daily and monthly spend rollups with raw Expense rows and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users", help="Only these user ids (repeatable).")
+
+    def handle(self, *args, **options):
+        user_ids = options["users"] or list(User.objects.order_by("id").values_list("id", flat=True))
+
+        users = drifted = 0
+        for user_id in user_ids:
+            users += 1
+            try:
+                fixed = reconcile_user_rollups(user_id)
+            except IntegrityError:
+                self.stdout.write(self.style.WARNING(f"user {user_id}: skipped, kept colliding with live writes"))
+                continue
+            drifted += fixed
+            if fixed:
+                self.stdout.write(f"user {user_id}: repaired {fixed} rollup rows")
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {users} users; repaired {drifted} rollup rows."))
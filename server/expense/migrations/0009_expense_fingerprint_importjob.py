@@ -0,0 +1,71 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:51
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_fingerprints(apps, schema_editor):
+    # Mirrors Expense.make_fingerprint; historical models don't carry its methods
+    import hashlib
+
+    Expense = apps.get_model('expense', 'Expense')
+    batch = []
+    for expense in Expense.objects.only('id', 'user_id', 'date', 'amount', 'description').iterator(chunk_size=2000):
+        normalized = ' '.join((expense.description or '').lower().split())
+        raw = f"{expense.user_id}|{expense.date}|{expense.amount:.2f}|{normalized}"
+        expense.fingerprint = hashlib.sha1(raw.encode()).hexdigest()
+        batch.append(expense)
+        if len(batch) >= 2000:
+            Expense.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        Expense.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense', '0008_monthlyuserspend'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file', models.FileField(upload_to='imports/')),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('ofx', 'OFX')], max_length=10)),
+                ('column_map', models.JSONField(blank=True, default=dict)),
+                ('date_format', models.CharField(blank=True, max_length=20)),
+                ('debits_only', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('bytes_total', models.BigIntegerField(default=0)),
+                ('bytes_read', models.BigIntegerField(default=0)),
+                ('rows_processed', models.PositiveIntegerField(default=0)),
+                ('rows_imported', models.PositiveIntegerField(default=0)),
+                ('rows_duplicate', models.PositiveIntegerField(default=0)),
+                ('rows_skipped', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='importjob',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
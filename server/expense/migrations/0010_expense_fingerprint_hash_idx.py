@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:51
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('expense', '0009_expense_fingerprint_importjob'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='expense',
+            index=django.contrib.postgres.indexes.HashIndex(fields=['fingerprint'], name='expense_fingerprint_hash_idx'),
+        ),
+    ]
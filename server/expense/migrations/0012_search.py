@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:56
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense', '0011_budget_alerts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # gin_trgm_ops for the partial-word search index
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='expense',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('description', config='english'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+    ]
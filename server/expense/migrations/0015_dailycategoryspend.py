@@ -0,0 +1,52 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_daily_spend(apps, schema_editor):
+    Expense = apps.get_model('expense', 'Expense')
+    DailyCategorySpend = apps.get_model('expense', 'DailyCategorySpend')
+    rows = (
+        Expense.objects.values('user_id', 'date', 'category', 'payment_method')
+        .annotate(total=models.Sum('amount'), count=models.Count('id'))
+        .order_by()
+    )
+    DailyCategorySpend.objects.bulk_create(
+        (
+            DailyCategorySpend(
+                user_id=row['user_id'], day=row['date'], category=row['category'],
+                payment_method=row['payment_method'], total=row['total'], count=row['count'],
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense', '0014_expense_changes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCategorySpend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('category', models.CharField(choices=[('food', 'Food'), ('transport', 'Transport'), ('entertainment', 'Entertainment'), ('health', 'Health'), ('shopping', 'Shopping'), ('other', 'Other')], max_length=20)),
+                ('payment_method', models.CharField(choices=[('cash', 'Cash'), ('card', 'Card'), ('upi', 'UPI'), ('other', 'Other')], max_length=10)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'day', 'category', 'payment_method')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_spend, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense', '0016_spend_anomalies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spendbaseline',
+            name='expense_ids',
+            field=models.BinaryField(default=bytes),
+        ),
+    ]
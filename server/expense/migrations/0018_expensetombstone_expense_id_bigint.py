@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense', '0017_spendbaseline_expense_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='expensetombstone',
+            name='expense_id',
+            field=models.BigIntegerField(),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense', '0018_expensetombstone_expense_id_bigint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='expenseanomaly',
+            name='expense_id',
+            field=models.BigIntegerField(unique=True),
+        ),
+    ]
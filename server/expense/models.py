@@ -1,5 +1,15 @@
+import hashlib
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, HashIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.utils.timezone import now
+
+from .rollups import ExpenseRow
+
+SEARCH_CONFIG = 'english'
 
 
 
@@ -31,6 +41,224 @@ class Expense(models.Model):
     description = models.TextField(blank=True)
     payment_method = models.CharField(max_length=10, choices=PAYMENT_METHODS)
     # receipt_image = models.ImageField(upload_to='receipts/', null=True, blank=True)
-    
+    # Hash of (user, date, amount, normalized description) used to dedupe imports
+    fingerprint = models.CharField(max_length=40, blank=True, default='', editable=False)
+    # Maintained by Postgres from description for full-text search
+    search_vector = models.GeneratedField(
+        expression=SearchVector('description', config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    # Bumped on every write, including bulk updates; drives GET /expense/changes/
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's list on (date, id)
+            models.Index(fields=['user', 'date', 'id'], name='expense_user_date_id_idx'),
+            # Per-category month/range totals (budget and charts)
+            models.Index(fields=['user', 'category', 'date'], name='expense_user_cat_date_idx'),
+            # Equality-only lookups when deduping statement imports
+            HashIndex(fields=['fingerprint'], name='expense_fingerprint_hash_idx'),
+            # Search: ranked full-text matches and trigram partial-word matches
+            GinIndex(fields=['search_vector'], name='expense_search_vector_idx'),
+            GinIndex(fields=['description'], name='expense_description_trgm_idx', opclasses=['gin_trgm_ops']),
+            # Change feed keyset on (updated_at, id)
+            models.Index(fields=['user', 'updated_at', 'id'], name='expense_user_updated_idx'),
+        ]
+
+    @staticmethod
+    def make_fingerprint(user_id, date, amount, description):
+        normalized = ' '.join((description or '').lower().split())
+        raw = f"{user_id}|{date}|{amount:.2f}|{normalized}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def refresh_fingerprint(self):
+        row = self.snapshot()
+        self.fingerprint = self.make_fingerprint(row.user_id, row.date, row.amount, self.description)
+
+    def save(self, *args, **kwargs):
+        self.refresh_fingerprint()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'fingerprint', 'updated_at'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so rollups can apply an exact delta on save
+        tracked = instance.get_deferred_fields() & set(ExpenseRow._fields)
+        instance._loaded_snapshot = None if tracked else instance.snapshot()
+        return instance
+
+    def snapshot(self):
+        meta = self._meta
+        return ExpenseRow(
+            self.user_id,
+            meta.get_field('date').to_python(self.date),
+            self.category,
+            self.payment_method,
+            meta.get_field('amount').to_python(self.amount),
+        )
+
     def __str__(self):
         return f"{self.user.username} - {self.amount} ({self.category})"
+
+
+class ExpenseTombstone(models.Model):
+    """Marks a deleted Expense so syncing clients can drop their copy"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    expense_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'id'], name='tombstone_user_deleted_idx'),
+            # Retention purge
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_at_idx'),
+        ]
+
+
+class MonthlyUserSpend(models.Model):
+    """Running per-user, per-month, per-category spend, kept in step with Expense"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.DateField()  # First day of the month
+    category = models.CharField(max_length=20, choices=Expense.CATEGORIES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'month', 'category')
+
+    def __str__(self):
+        return f"{self.user_id} {self.month:%Y-%m} {self.category}: {self.total}"
+
+
+class DailyCategorySpend(models.Model):
+    """Per-user spend by day, category and payment method; the source for charts"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    day = models.DateField()
+    category = models.CharField(max_length=20, choices=Expense.CATEGORIES)
+    payment_method = models.CharField(max_length=10, choices=Expense.PAYMENT_METHODS)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        # Also serves (user, day range) scans for the charts
+        unique_together = ('user', 'day', 'category', 'payment_method')
+
+    def __str__(self):
+        return f"{self.user_id} {self.day} {self.category}/{self.payment_method}: {self.total}"
+
+
+class CategoryBudget(models.Model):
+    """A user's monthly spending limit for one category"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='category_budgets')
+    category = models.CharField(max_length=20, choices=Expense.CATEGORIES)
+    monthly_limit = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        unique_together = ('user', 'category')
+
+    def __str__(self):
+        return f"{self.user_id} {self.category}: {self.monthly_limit}"
+
+
+class BudgetAlertState(models.Model):
+    """Highest alert threshold already sent for a user's budget scope in a month"""
+    OVERALL = 'overall'  # Scope of the UserProfile.monthly_budget; otherwise a category
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.DateField()  # First day of the month
+    scope = models.CharField(max_length=20)
+    threshold = models.PositiveSmallIntegerField()  # Percent of the limit
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'month', 'scope')
+
+    def __str__(self):
+        return f"{self.user_id} {self.month:%Y-%m} {self.scope} >= {self.threshold}%"
+
+
+class SpendBaseline(models.Model):
+    """A user's recent expense amounts in one category; incremental state for anomaly detection"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    category = models.CharField(max_length=20, choices=Expense.CATEGORIES)
+    # Last ANOMALY_WINDOW_SIZE amounts, oldest first, as little-endian float64
+    amounts = models.BinaryField(default=bytes)
+    # The expense id of each amount, as little-endian int64
+    expense_ids = models.BinaryField(default=bytes)
+    # Expense changes up to this instant have been folded in
+    scanned_through = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'category')
+        indexes = [
+            models.Index(fields=['scanned_through'], name='baseline_scanned_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.category} through {self.scanned_through}"
+
+
+class ExpenseAnomaly(models.Model):
+    """An expense flagged as unusually large against the user's baseline for its category"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    expense_id = models.BigIntegerField(unique=True)
+    category = models.CharField(max_length=20, choices=Expense.CATEGORIES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    baseline_median = models.DecimalField(max_digits=10, decimal_places=2)
+    score = models.FloatField()  # Robust z-score: distance above the median in scaled MADs
+    detected_at = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-detected_at'], name='anomaly_user_detected_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} expense {self.expense_id}: {self.amount} vs {self.baseline_median}"
+
+
+class ImportJob(models.Model):
+    """A bank statement upload being loaded into Expense in the background"""
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ofx', 'OFX'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='import_jobs')
+    file = models.FileField(upload_to='imports/')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    column_map = models.JSONField(default=dict, blank=True)  # {"amount": "Withdrawal Amt.", ...}
+    date_format = models.CharField(max_length=20, blank=True)  # strptime format, guessed when blank
+    debits_only = models.BooleanField(default=False)  # Signed statements: only import negative amounts
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    bytes_total = models.BigIntegerField(default=0)
+    bytes_read = models.BigIntegerField(default=0)
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_imported = models.PositiveIntegerField(default=0)
+    rows_duplicate = models.PositiveIntegerField(default=0)
+    rows_skipped = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)  # First few row errors
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Import {self.id} ({self.format}, {self.status})"
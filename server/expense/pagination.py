@@ -0,0 +1,67 @@
+import base64
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(expense_date, expense_id):
+    raw = f"{expense_date.isoformat()}:{expense_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date_part, id_part = raw.split(":", 1)
+        return date.fromisoformat(date_part), int(id_part)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor.")
+
+
+def get_page_size(request):
+    """
+    Page size from ?page_size=, clamped to EXPENSE_MAX_PAGE_SIZE.
+    """
+    default = getattr(settings, "EXPENSE_PAGE_SIZE", 50)
+    maximum = getattr(settings, "EXPENSE_MAX_PAGE_SIZE", 500)
+    try:
+        page_size = int(request.query_params.get("page_size", default))
+    except (TypeError, ValueError):
+        page_size = default
+    return max(1, min(page_size, maximum))
+
+
+def paginate_expenses(queryset, cursor=None, page_size=50, key=None):
+    """
+    Keyset pagination on (date, id), newest first.
+
+    ``key`` extracts (date, id) from a row; by default rows are model
+    instances, pass one for values()/values_list() querysets.
+
+    The ``date <= cursor_date`` bound lets Postgres start an index range scan
+    on (user, date, id) right at the cursor; the OR only trims the rows that
+    share the cursor's date.
+    """
+    queryset = queryset.order_by("-date", "-id")
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        queryset = queryset.filter(date__lte=cursor_date).filter(
+            Q(date__lt=cursor_date) | Q(id__lt=cursor_id)
+        )
+
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    next_cursor = None
+    if has_more:
+        key = key or (lambda row: (row.date, row.id))
+        next_cursor = encode_cursor(*key(rows[-1]))
+
+    return rows, next_cursor, has_more
@@ -0,0 +1,359 @@
+"""
+Declarative range partitioning of expense_expense by date (PostgreSQL only).
+
+The table is converted once with ``manage.py partition_expenses convert``.
+After that the daily ``ensure_expense_partitions`` task keeps partitions ready
+ahead of today. Old partitions can be detached, and optionally moved to an
+archive schema, without rewriting the live table.
+
+Django keeps treating ``id`` as the primary key. Postgres needs the partition
+key in every unique constraint, so the table's key becomes (id, date) and ids
+come from a plain sequence. Foreign keys *into* the table
+(ScheduledExpenseLog.expense, GroupExpense.personal_expense) can't reference
+it any more. Each is replaced by a pair of triggers: inserts and updates on
+the referencing table must name an existing expense, and an expense can't be
+deleted while still referenced. Their SET_NULL behaviour keeps running in
+Django's delete collector and in bulk_delete_expenses, before the delete.
+
+Django's migration state still describes the unpartitioned table. Convert
+only with every ``expense`` migration applied (it refuses otherwise). Later
+migrations on Expense must be written for the partitioned table: plain
+AddIndex rather than AddIndexConcurrently, and no new foreign keys into it.
+"""
+import re
+from collections import namedtuple
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from .models import Expense
+
+TABLE = Expense._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+LEGACY_TABLE = f"{TABLE}_unpartitioned"
+SEQUENCE = f"{TABLE}_id_seq"
+INTERVALS = ('year', 'month')
+
+Partition = namedtuple('Partition', 'name start end')
+
+BOUND = re.compile(r"FROM \('([\d-]+)'\) TO \('([\d-]+)'\)")
+
+
+class PartitioningError(Exception):
+    pass
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+def _require_postgres():
+    if connection.vendor != 'postgresql':
+        raise PartitioningError("Table partitioning needs PostgreSQL.")
+
+
+def _columns():
+    # Generated columns (search_vector) are computed by each partition, never copied
+    return ', '.join(_qn(f.column) for f in Expense._meta.concrete_fields if not f.generated)
+
+
+def get_interval():
+    interval = getattr(settings, 'EXPENSE_PARTITION_INTERVAL', 'year')
+    if interval not in INTERVALS:
+        raise PartitioningError(f"EXPENSE_PARTITION_INTERVAL must be one of {INTERVALS}, not {interval!r}.")
+    return interval
+
+
+def partition_range(day, interval):
+    """
+    The [start, end) bounds of the partition that holds ``day``.
+    """
+    if interval == 'year':
+        return date(day.year, 1, 1), date(day.year + 1, 1, 1)
+    start = day.replace(day=1)
+    return start, date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def partition_name(start, interval):
+    if interval == 'year':
+        return f"{TABLE}_y{start.year}"
+    return f"{TABLE}_y{start.year}m{start.month:02d}"
+
+
+def is_partitioned():
+    _require_postgres()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def archived_before():
+    """
+    Start of the oldest attached partition once the table is partitioned, or
+    None. Expenses dated earlier were detached (or never existed), so rollup
+    rows from before it may be the only record of those months.
+    """
+    if connection.vendor != 'postgresql' or not is_partitioned():
+        return None
+    return min((partition.start for partition in list_partitions() if partition.start), default=None)
+
+
+def list_partitions():
+    """
+    The table's partitions, oldest first. The default partition comes last,
+    with no bounds.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [TABLE],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = BOUND.search(bound)
+        if match:
+            partitions.append(Partition(name, date.fromisoformat(match[1]), date.fromisoformat(match[2])))
+        else:
+            partitions.append(Partition(name, None, None))
+    return sorted(partitions, key=lambda p: (p.start is None, p.start))
+
+
+def _create_partition(cursor, start, end, name):
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {_qn(DEFAULT_PARTITION)} WHERE date >= %s AND date < %s)", [start, end]
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE TABLE {_qn(name)} PARTITION OF {_qn(TABLE)} FOR VALUES {bounds}")
+        return
+
+    # Rows for this range already landed in the default partition, and Postgres
+    # won't create an overlapping partition, so move them across and attach
+    columns = _columns()
+    cursor.execute(
+        f"CREATE TABLE {_qn(name)} (LIKE {_qn(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)"
+    )
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {_qn(DEFAULT_PARTITION)} WHERE date >= %s AND date < %s RETURNING {columns}) "
+        f"INSERT INTO {_qn(name)} ({columns}) SELECT {columns} FROM moved",
+        [start, end],
+    )
+    cursor.execute(f"ALTER TABLE {_qn(TABLE)} ATTACH PARTITION {_qn(name)} FOR VALUES {bounds}")
+
+
+def ensure_partitions(ahead=None, today=None, interval=None):
+    """
+    Create any missing partitions from the one holding ``today`` to ``ahead``
+    intervals beyond it. Returns the names created.
+    """
+    interval = interval or get_interval()
+    ahead = getattr(settings, 'EXPENSE_PARTITIONS_AHEAD', 2) if ahead is None else ahead
+    start, end = partition_range(today or now().date(), interval)
+
+    wanted = []
+    for _ in range(ahead + 1):
+        wanted.append((start, end))
+        start, end = partition_range(end, interval)
+
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        existing = [p for p in list_partitions() if p.start is not None]
+        for start, end in wanted:
+            if any(p.start < end and start < p.end for p in existing):
+                continue
+            name = partition_name(start, interval)
+            _create_partition(cursor, start, end, name)
+            created.append(name)
+    return created
+
+
+def _index_definitions(cursor):
+    cursor.execute(
+        """
+        SELECT c.relname, pg_get_indexdef(i.indexrelid), i.indisunique
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass AND NOT i.indisprimary
+        """,
+        [TABLE],
+    )
+    return cursor.fetchall()
+
+
+def _foreign_keys(cursor, column):
+    """
+    (table, constraint name, definition) of the foreign keys on (``conrelid``)
+    or pointing at (``confrelid``) the expense table.
+    """
+    cursor.execute(
+        f"""
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint WHERE contype = 'f' AND {column} = %s::regclass
+        """,
+        [TABLE],
+    )
+    return cursor.fetchall()
+
+
+FOREIGN_KEY_COLUMN = re.compile(r"FOREIGN KEY \((\w+)\)")
+
+# Stand-ins for a foreign key into the partitioned table; see the module docstring
+REFERENCE_TRIGGERS = """
+CREATE FUNCTION {check_function}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.{column} IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {table} WHERE id = NEW.{column}) THEN
+        RAISE foreign_key_violation USING MESSAGE = format('{referencing}.{column}=%s: no such expense', NEW.{column});
+    END IF;
+    RETURN NEW;
+END $$;
+CREATE TRIGGER {check_trigger} BEFORE INSERT OR UPDATE OF {column} ON {referencing}
+    FOR EACH ROW EXECUTE FUNCTION {check_function}();
+CREATE FUNCTION {guard_function}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM {referencing} WHERE {column} = OLD.id) THEN
+        RAISE foreign_key_violation USING MESSAGE = format('expense %s is still referenced from {referencing}.{column}', OLD.id);
+    END IF;
+    RETURN OLD;
+END $$;
+CREATE TRIGGER {guard_trigger} AFTER DELETE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION {guard_function}();
+"""
+
+
+def _replace_foreign_key(cursor, referencing, definition):
+    column = FOREIGN_KEY_COLUMN.search(definition)[1]
+    base = f"{referencing}_{column}"[:40]
+    cursor.execute(REFERENCE_TRIGGERS.format(
+        table=_qn(TABLE), referencing=referencing, column=column,
+        check_function=_qn(f"{base}_fk_check"), check_trigger=_qn(f"{base}_fk_check"),
+        guard_function=_qn(f"{base}_fk_guard"), guard_trigger=_qn(f"{base}_fk_guard"),
+    ))
+
+
+def _unapplied_expense_migrations():
+    from django.db.migrations.executor import MigrationExecutor
+
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return [migration.name for migration, backwards in plan if migration.app_label == 'expense' and not backwards]
+
+
+def convert_to_partitioned(interval=None, ahead=None, keep_legacy=False, log=lambda message: None):
+    """
+    Rebuild expense_expense as a range-partitioned table and copy every row in.
+
+    Everything runs in one transaction under an ACCESS EXCLUSIVE lock, so
+    expense reads and writes wait until it commits. Run it in a maintenance
+    window. With ``keep_legacy`` the old heap is kept as
+    expense_expense_unpartitioned, without its secondary indexes.
+    """
+    _require_postgres()
+    if is_partitioned():
+        raise PartitioningError(f"{TABLE} is already partitioned.")
+    pending = _unapplied_expense_migrations()
+    if pending:
+        raise PartitioningError(
+            f"Apply the pending expense migrations first ({', '.join(pending)}); "
+            "they are written for the unpartitioned table."
+        )
+    interval = interval or get_interval()
+    table, legacy, columns = _qn(TABLE), _qn(LEGACY_TABLE), _columns()
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        indexes = _index_definitions(cursor)
+        outgoing = _foreign_keys(cursor, 'conrelid')
+
+        incoming = _foreign_keys(cursor, 'confrelid')
+        for referencing, name, _ in incoming:
+            log(f"Dropping foreign key {name} on {referencing}")
+            cursor.execute(f"ALTER TABLE {referencing} DROP CONSTRAINT {_qn(name)}")
+
+        # Free the index, key and sequence names for the new table
+        for name, _, _ in indexes:
+            cursor.execute(f"DROP INDEX {_qn(name)}")
+        cursor.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {_qn(TABLE + '_pkey')} TO {_qn(LEGACY_TABLE + '_pkey')}")
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        cursor.execute(f"ALTER TABLE {legacy} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+
+        cursor.execute(
+            f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED "
+            f"INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE (date)"
+        )
+        cursor.execute(f"CREATE SEQUENCE {_qn(SEQUENCE)} OWNED BY {table}.id")
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}'::regclass)")
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {_qn(TABLE + '_pkey')} PRIMARY KEY (id, date)")
+        for _, name, definition in outgoing:
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {_qn(name)} {definition}")
+
+        cursor.execute(f"CREATE TABLE {_qn(DEFAULT_PARTITION)} PARTITION OF {table} DEFAULT")
+        cursor.execute(f"SELECT min(date), max(id) FROM {legacy}")
+        oldest, max_id = cursor.fetchone()
+
+        start, end = partition_range(oldest or now().date(), interval)
+        last_end = partition_range(now().date(), interval)[1]
+        while start < last_end:
+            _create_partition(cursor, start, end, partition_name(start, interval))
+            start, end = partition_range(end, interval)
+
+        log(f"Copying rows from {LEGACY_TABLE}")
+        cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {legacy}")
+        cursor.execute("SELECT setval(%s, %s)", [SEQUENCE, max_id or 1])
+
+        # Building indexes after the copy is much cheaper than maintaining them
+        # row by row. Each definition still names expense_expense, which is now
+        # the partitioned table.
+        for name, definition, unique in indexes:
+            if unique:
+                log(f"Skipping unique index {name}: it can't be enforced without the partition key")
+                continue
+            log(f"Creating index {name}")
+            cursor.execute(definition)
+
+        for referencing, name, definition in incoming:
+            log(f"Enforcing {name} on {referencing} with triggers")
+            _replace_foreign_key(cursor, referencing, definition)
+
+        if not keep_legacy:
+            cursor.execute(f"DROP TABLE {legacy}")
+        cursor.execute(f"ANALYZE {table}")
+
+    return ensure_partitions(ahead=ahead, interval=interval)
+
+
+def detach_partitions(before, archive_schema=None, drop=False):
+    """
+    Detach every partition that ends on or before ``before``.
+
+    Detaching only changes catalog entries; no rows are rewritten. Detached
+    tables keep their data and can be moved to ``archive_schema`` or dropped.
+    MonthlyUserSpend keeps the totals for those months;
+    reconcile_user_rollups leaves them alone.
+    Detached rows don't fire the reference triggers, so group expenses and
+    schedule logs can keep pointing at archived expense ids.
+    """
+    _require_postgres()
+    detached = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if archive_schema:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {_qn(archive_schema)}")
+
+        for partition in list_partitions():
+            if partition.end is None or partition.end > before:
+                continue
+            name = _qn(partition.name)
+            cursor.execute(f"ALTER TABLE {_qn(TABLE)} DETACH PARTITION {name}")
+            if drop:
+                cursor.execute(f"DROP TABLE {name}")
+            elif archive_schema:
+                cursor.execute(f"ALTER TABLE {name} SET SCHEMA {_qn(archive_schema)}")
+            detached.append(partition.name)
+    return detached
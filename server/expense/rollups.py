@@ -0,0 +1,172 @@
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.dispatch import Signal
+
+from .versions import bump_data_version
+
+
+# The fields of an Expense that derived totals depend on
+ExpenseRow = namedtuple("ExpenseRow", "user_id date category payment_method amount")
+
+# Sent once the transaction that changed daily rollup rows commits, with
+# ``user_days``: {user_id: set of days whose totals changed}. For caches
+# that patch themselves from the rollup instead of being dropped.
+expense_rows_changed = Signal()
+
+
+def _send_rows_changed(user_days):
+    user_days = {user_id: set(days) for user_id, days in user_days.items() if days}
+    if user_days:
+        transaction.on_commit(lambda: expense_rows_changed.send_robust(sender=None, user_days=user_days))
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def apply_expense_changes(changes):
+    """
+    Apply a batch of expense writes to the rollup tables.
+
+    ``changes`` is an iterable of ``(old, new)`` ExpenseRow pairs: ``(None, row)``
+    for an insert, ``(row, None)`` for a delete and ``(old, new)`` for an update.
+    Deltas are merged per rollup key first, so a batch of any size costs one
+    upsert per distinct rollup row touched. Keys are applied in sorted order
+    so concurrent batches lock shared rows in the same order.
+    """
+    monthly = defaultdict(lambda: [Decimal("0"), 0])
+    daily = defaultdict(lambda: [Decimal("0"), 0])
+
+    for old, new in changes:
+        for row, sign in ((old, -1), (new, 1)):
+            if row is None:
+                continue
+            for bucket in (
+                monthly[(row.user_id, month_start(row.date), row.category)],
+                daily[(row.user_id, row.date, row.category, row.payment_method)],
+            ):
+                bucket[0] += sign * row.amount
+                bucket[1] += sign
+
+    if not monthly:
+        return
+
+    from .models import DailyCategorySpend, MonthlyUserSpend
+
+    with transaction.atomic():
+        for (user_id, month, category), (amount, count) in sorted(monthly.items()):
+            if amount == 0 and count == 0:
+                continue
+            _add_to_rollup(MonthlyUserSpend, {"user_id": user_id, "month": month, "category": category}, amount, count)
+
+        for (user_id, day, category, payment_method), (amount, count) in sorted(daily.items()):
+            if amount == 0 and count == 0:
+                continue
+            key = {"user_id": user_id, "day": day, "category": category, "payment_method": payment_method}
+            _add_to_rollup(DailyCategorySpend, key, amount, count)
+
+    bump_data_version(user_id for user_id, _, _ in monthly)
+
+    user_days = defaultdict(set)
+    for (user_id, day, _, _), (amount, count) in daily.items():
+        if amount or count:
+            user_days[user_id].add(day)
+    _send_rows_changed(user_days)
+
+
+def _add_to_rollup(model, key, amount, count):
+    """
+    Increment one rollup row in place, creating it on first use.
+    """
+    updated = model.objects.filter(**key).update(total=F("total") + amount, count=F("count") + count)
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, total=amount, count=count)
+    except IntegrityError:
+        # Another writer created the row first; add to theirs
+        model.objects.filter(**key).update(total=F("total") + amount, count=F("count") + count)
+
+
+def reconcile_user_rollups(user_id, attempts=3):
+    """
+    Recompute a user's rollup rows from Expense and repair any that drifted,
+    e.g. after a write that bypassed the signals. Returns how many rows were
+    wrong.
+
+    Every rollup row of the user is compared, and rows with no expenses
+    behind them are deleted. The exception is rows dated before the oldest
+    attached partition (see partitioning.archived_before): they hold the
+    totals of months archived with ``partition_expenses detach`` and are kept
+    unless there are expenses to compare them with.
+
+    Only existing rollup rows can be locked, so a concurrent write may create
+    a missing bucket first; the repair then rolls back and is retried, which
+    locks the new row. IntegrityError is raised once ``attempts`` run out.
+    """
+    for attempt in range(attempts):
+        try:
+            return _reconcile_user_rollups(user_id)
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
+
+
+def _reconcile_user_rollups(user_id):
+    from .models import DailyCategorySpend, Expense, MonthlyUserSpend
+    from .partitioning import archived_before
+
+    expenses = Expense.objects.filter(user_id=user_id)
+    archived = archived_before()
+    rollups = (
+        (MonthlyUserSpend, "month", {"month": TruncMonth("date")}, ("month", "category")),
+        (DailyCategorySpend, "day", {"day": F("date")}, ("day", "category", "payment_method")),
+    )
+
+    drifted = 0
+    repaired_days = set()
+    with transaction.atomic():
+        for model, date_field, annotations, key_fields in rollups:
+            # Lock first so writes landing during the recompute wait for it
+            current = {
+                tuple(getattr(rollup, field) for field in key_fields): rollup
+                for rollup in model.objects.select_for_update().filter(user_id=user_id)
+            }
+            expected = (
+                expenses.annotate(**annotations)
+                .values(*key_fields).annotate(total=Sum("amount"), count=Count("id")).order_by()
+            )
+
+            missing, changed = [], []
+            for row in expected:
+                rollup = current.pop(tuple(row[field] for field in key_fields), None)
+                if rollup is None:
+                    missing.append(model(user_id=user_id, **row))
+                elif (rollup.total, rollup.count) != (row["total"], row["count"]):
+                    rollup.total, rollup.count = row["total"], row["count"]
+                    changed.append(rollup)
+
+            # Whatever is left has no expenses behind it; empty buckets go
+            # too, but archived months keep their totals
+            stale = [
+                rollup for rollup in current.values()
+                if archived is None or getattr(rollup, date_field) >= archived
+            ]
+            drifted += len(missing) + len(changed) + sum(1 for rollup in stale if rollup.count or rollup.total)
+            model.objects.bulk_create(missing, batch_size=2000)
+            model.objects.bulk_update(changed, ["total", "count"], batch_size=2000)
+            model.objects.filter(id__in=[rollup.id for rollup in stale]).delete()
+            if model is DailyCategorySpend:
+                repaired_days.update(row.day for row in (*missing, *changed, *stale))
+
+        if drifted:
+            bump_data_version([user_id])
+            _send_rows_changed({user_id: repaired_days})
+
+    return drifted
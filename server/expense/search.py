@@ -0,0 +1,77 @@
+"""
+Ranked search over personal and group expense descriptions.
+
+``fts`` mode matches whole words against the generated ``search_vector``
+columns (GIN indexed) and ranks with ts_rank. ``trigram`` mode finds partial
+words ("pharm", "ube") through the pg_trgm GIN index on description and ranks
+by word similarity.
+"""
+from heapq import merge
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F
+
+from split.models import GroupExpense
+
+from .models import Expense, SEARCH_CONFIG
+
+SEARCH_MODES = ('fts', 'trigram')
+SEARCH_SCOPES = ('personal', 'group', 'all')
+
+
+def _ranked(queryset, q, mode):
+    if mode == 'fts':
+        query = SearchQuery(q, config=SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(rank=SearchRank(F('search_vector'), query))
+
+    # %> alone: an OR with icontains (UPPER(...) LIKE) can't use the trigram index
+    return queryset.filter(description__trigram_word_similar=q).annotate(
+        rank=TrigramWordSimilarity(q, 'description')
+    )
+
+
+def _personal_hits(user, q, mode, limit):
+    rows = (
+        _ranked(Expense.objects.filter(user=user), q, mode)
+        .order_by('-rank', '-date', '-id')
+        .values_list('rank', 'id', 'description', 'amount', 'date', 'category')[:limit]
+    )
+    for rank, expense_id, description, amount, day, category in rows:
+        yield {
+            'type': 'personal', 'id': expense_id, 'description': description,
+            'amount': f"{amount:.2f}", 'date': day.isoformat(), 'category': category,
+            'group': None, 'rank': round(rank, 4),
+        }
+
+
+def _group_hits(user, q, mode, limit):
+    rows = (
+        _ranked(GroupExpense.objects.filter(group__members__user=user), q, mode)
+        .order_by('-rank', '-date', '-id')
+        .values_list('rank', 'id', 'description', 'amount', 'date', 'category', 'group__group_name')[:limit]
+    )
+    for rank, expense_id, description, amount, day, category, group_name in rows:
+        yield {
+            'type': 'group', 'id': str(expense_id), 'description': description,
+            'amount': f"{amount:.2f}", 'date': day.isoformat(), 'category': category,
+            'group': group_name, 'rank': round(rank, 4),
+        }
+
+
+def search_expenses(user, q, mode='fts', scope='all', offset=0, limit=20):
+    """
+    One page of hits, best first, plus whether more follow.
+
+    Each source is already ordered by rank in the database, so for ``all`` the
+    two streams are merged rather than re-sorted, fetching only as many rows
+    from each as the page can need.
+    """
+    needed = offset + limit + 1
+    sources = []
+    if scope in ('personal', 'all'):
+        sources.append(_personal_hits(user, q, mode, needed))
+    if scope in ('group', 'all'):
+        sources.append(_group_hits(user, q, mode, needed))
+
+    hits = list(merge(*sources, key=lambda hit: -hit['rank']))[offset:needed]
+    return hits[:limit], len(hits) > limit
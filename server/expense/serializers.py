@@ -1,7 +1,143 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Expense
+from .models import Expense, ImportJob, CategoryBudget, ExpenseAnomaly
 
 class ExpenseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Expense
         fields = ['id', 'user', 'amount', 'category', 'date', 'description', 'payment_method']
+
+
+def _as_decimal_string(value):
+    # Same output as DRF's DecimalField(decimal_places=2) with COERCE_DECIMAL_TO_STRING
+    return None if value is None else f"{value:.2f}"
+
+
+def _as_isoformat(value):
+    return None if value is None else value.isoformat()
+
+
+class ExpenseValuesSerializer:
+    """
+    Read-only fast path producing the same dicts as ExpenseSerializer, built
+    directly from ``values_list()`` tuples with per-field converters chosen
+    once up front instead of DRF's per-field, per-row machinery.
+    """
+    FIELDS = ExpenseSerializer.Meta.fields
+    SOURCES = {'user': 'user_id'}
+    CONVERTERS = {'amount': _as_decimal_string, 'date': _as_isoformat}
+
+    def __init__(self, fields=None):
+        fields = list(fields or self.FIELDS)
+        unknown = [f for f in fields if f not in self.FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        self.fields = fields
+        self.columns = [self.SOURCES.get(f, f) for f in fields]
+
+    @classmethod
+    def from_query_param(cls, value):
+        """Build from a ?fields=id,amount,date style parameter."""
+        fields = [f.strip() for f in (value or '').split(',') if f.strip()]
+        return cls(fields or None)
+
+    def serialize(self, rows):
+        fields = self.fields
+        converters = [(i, self.CONVERTERS[f]) for i, f in enumerate(fields) if f in self.CONVERTERS]
+        if not converters:
+            return [dict(zip(fields, row)) for row in rows]
+
+        data = []
+        for row in rows:
+            row = list(row[:len(fields)])
+            for i, convert in converters:
+                row[i] = convert(row[i])
+            data.append(dict(zip(fields, row)))
+        return data
+
+
+class ExpenseBulkItemSerializer(serializers.ModelSerializer):
+    """One row of a bulk create; the owner is set by the view, not looked up per row."""
+    class Meta:
+        model = Expense
+        fields = ['amount', 'category', 'date', 'description', 'payment_method']
+
+
+class ExpenseBulkIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_ids(self, ids):
+        max_items = getattr(settings, 'EXPENSE_BULK_MAX_ITEMS', 1000)
+        if len(ids) > max_items:
+            raise serializers.ValidationError(f"At most {max_items} ids per request.")
+        return list(dict.fromkeys(ids))
+
+
+class ExpenseBulkPatchSerializer(ExpenseBulkIdsSerializer):
+    category = serializers.ChoiceField(choices=Expense.CATEGORIES, required=False)
+    payment_method = serializers.ChoiceField(choices=Expense.PAYMENT_METHODS, required=False)
+
+    def to_internal_value(self, data):
+        # Accept {"ids": [...], "patch": {...}} as well as flat fields
+        if isinstance(data, dict) and isinstance(data.get('patch'), dict):
+            data = {**data['patch'], 'ids': data.get('ids')}
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        if not set(attrs) - {'ids'}:
+            raise serializers.ValidationError("Provide a category and/or payment_method to set.")
+        return attrs
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'format', 'column_map', 'date_format', 'debits_only', 'status', 'progress',
+            'rows_processed', 'rows_imported', 'rows_duplicate', 'rows_skipped', 'errors',
+            'created_at', 'updated_at', 'finished_at',
+        ]
+        read_only_fields = [
+            'id', 'status', 'progress', 'rows_processed', 'rows_imported', 'rows_duplicate',
+            'rows_skipped', 'errors', 'created_at', 'updated_at', 'finished_at',
+        ]
+
+    def get_progress(self, job):
+        if job.status == 'completed':
+            return 100
+        if not job.bytes_total:
+            return 0
+        return min(99, int(job.bytes_read * 100 / job.bytes_total))
+
+    def validate_column_map(self, value):
+        if not isinstance(value, dict) or not all(isinstance(header, str) for header in value.values()):
+            raise serializers.ValidationError("Must be a JSON object mapping fields to column headers.")
+        return value
+
+
+class CategoryBudgetListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        categories = [item['category'] for item in attrs]
+        duplicates = sorted({category for category in categories if categories.count(category) > 1})
+        if duplicates:
+            raise serializers.ValidationError(f"Each category may appear once; repeated: {', '.join(duplicates)}.")
+        return attrs
+
+
+class CategoryBudgetSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CategoryBudget
+        fields = ['category', 'monthly_limit']
+        list_serializer_class = CategoryBudgetListSerializer
+
+
+class ExpenseAnomalySerializer(serializers.ModelSerializer):
+    # Set from the flagged expense by the view
+    date = serializers.DateField(source='expense.date', read_only=True)
+    description = serializers.CharField(source='expense.description', read_only=True)
+
+    class Meta:
+        model = ExpenseAnomaly
+        fields = ['expense_id', 'date', 'category', 'amount', 'description', 'baseline_median', 'score', 'detected_at']
@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Expense, ExpenseTombstone
+from .rollups import apply_expense_changes
+
+
+@receiver(pre_save, sender=Expense)
+def remember_previous_expense(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance._loaded_snapshot = None
+        return
+
+    # Instances loaded with .only()/.defer() or built by hand don't carry a snapshot
+    if getattr(instance, "_loaded_snapshot", None) is None:
+        previous = Expense.objects.filter(pk=instance.pk).first()
+        instance._loaded_snapshot = previous.snapshot() if previous else None
+
+
+@receiver(post_save, sender=Expense)
+def update_rollups_on_save(sender, instance, created, **kwargs):
+    new = instance.snapshot()
+    old = None if created else instance._loaded_snapshot
+    if old != new:
+        apply_expense_changes([(old, new)])
+    instance._loaded_snapshot = new
+
+
+@receiver(pre_delete, sender=Expense)
+def remember_deleted_expense(sender, instance, **kwargs):
+    if getattr(instance, "_loaded_snapshot", None) is None:
+        instance.refresh_from_db()
+        instance._loaded_snapshot = instance.snapshot()
+
+
+@receiver(post_delete, sender=Expense)
+def update_rollups_on_delete(sender, instance, origin=None, **kwargs):
+    # Deleting the user cascades to the rollups as well; nothing to keep exact
+    if isinstance(origin, User):
+        return
+    apply_expense_changes([(instance._loaded_snapshot, None)])
+    # Let synced clients drop their copy; see GET /expense/changes/
+    ExpenseTombstone.objects.create(user_id=instance.user_id, expense_id=instance.pk)
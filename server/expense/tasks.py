@@ -2,20 +2,36 @@
 from celery import shared_task
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
-from datetime import datetime
+from datetime import datetime, timedelta
+from itertools import islice
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F
+from django.utils.timezone import now
+from .importers import PARSERS, ImportRowError
+from .models import Expense, ExpenseTombstone, ImportJob
+from .rollups import apply_expense_changes, reconcile_user_rollups
 
 @shared_task
-def send_budget_alert_email_task(user_email, username, total_expenses, budget):
+def send_budget_alert_email_task(user_email, username, total_expenses, budget, threshold=100, category=None):
     """
-    Send a styled budget alert email when the user exceeds their monthly budget.
+    Send a styled budget alert email when the user reaches ``threshold`` percent
+    of their monthly budget, or of a category's limit when ``category`` is given.
     """
     try:
-        subject = "⚠️ Budget Alert: You've Exceeded Your Monthly Limit"
+        budget_name = f"{category} budget" if category else "monthly budget"
+        if threshold >= 100:
+            subject = f"⚠️ Budget Alert: You've Exceeded Your {budget_name.title()}"
+            headline = "Budget Exceeded Alert"
+            status_line = f"You have exceeded your {budget_name} of ₹{budget}."
+        else:
+            subject = f"⚠️ Budget Alert: {threshold}% of Your {budget_name.title()} Used"
+            headline = f"{threshold}% of Budget Used"
+            status_line = f"You have used {threshold}% of your {budget_name} of ₹{budget}."
         today = datetime.now().strftime("%Y-%m-%d")
         
         text_content = (
             f"Hi {username},\n\n"
-            f"You have exceeded your monthly budget of ₹{budget}.\n"
+            f"{status_line}\n"
             f"Your total expenses are now ₹{total_expenses}.\n"
             f"Please review your expenses and consider adjusting your budget or spending.\n\n"
             "Best regards,\n"
@@ -37,12 +53,12 @@ def send_budget_alert_email_task(user_email, username, total_expenses, budget):
             <body>
                 <div class="container">
                     <div class="header">
-                        <h2>🚨 Budget Exceeded Alert</h2>
+                        <h2>🚨 {headline}</h2>
                         <p>Date: {today}</p>
                     </div>
                     <div class="content">
                         <p>Hi <strong>{username}</strong>,</p>
-                        <p>We noticed that your <strong>total expenses</strong> have reached <span style="color: #e74c3c;"><strong>₹{total_expenses}</strong></span>, which is over your monthly budget of <strong>₹{budget}</strong>.</p>
+                        <p>We noticed that your <strong>total expenses</strong> have reached <span style="color: #e74c3c;"><strong>₹{total_expenses}</strong></span>. {status_line}</p>
                         <p>Please take a moment to review your recent transactions and consider adjusting your spending habits to stay within your financial goals.</p>
                         <p>If this was expected or you’ve recently updated your budget, you can disregard this alert.</p>
                     </div>
@@ -70,3 +86,137 @@ def send_budget_alert_email_task(user_email, username, total_expenses, budget):
     
     except Exception as e:
         return f"Failed to send budget alert to {user_email}: {str(e)}"
+
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_ERRORS = 50
+
+
+@shared_task
+def import_bank_statement(job_id):
+    """
+    Load an uploaded statement into Expense in chunks, skipping rows already on file.
+    """
+    job = ImportJob.objects.get(id=job_id)
+    ImportJob.objects.filter(id=job.id).update(status='running', bytes_total=job.file.size)
+    errors = []
+
+    # How many of each fingerprint this job has inserted so far, so rows that
+    # legitimately repeat within the file are kept while rows that were
+    # already in the database before the import are not duplicated
+    inserted_by_job = {}
+    seen_in_file = {}
+
+    try:
+        with job.file.open('rb') as raw:
+            records = PARSERS[job.format](
+                raw, column_map=job.column_map, date_format=job.date_format, debits_only=job.debits_only
+            )
+
+            while True:
+                chunk = list(islice(records, IMPORT_CHUNK_SIZE))
+                if not chunk:
+                    break
+
+                candidates, skipped = [], 0
+                for line, record in chunk:
+                    if record is None:
+                        skipped += 1
+                    elif isinstance(record, ImportRowError):
+                        skipped += 1
+                        if len(errors) < IMPORT_MAX_ERRORS:
+                            errors.append({"line": line, "error": str(record)})
+                    else:
+                        expense = Expense(user_id=job.user_id, **record)
+                        expense.refresh_fingerprint()
+                        candidates.append(expense)
+
+                fingerprints = {expense.fingerprint for expense in candidates}
+                in_db = dict(
+                    Expense.objects.filter(user_id=job.user_id, fingerprint__in=fingerprints)
+                    .values('fingerprint').annotate(n=Count('id')).values_list('fingerprint', 'n')
+                )
+
+                existed_before = {fp: in_db.get(fp, 0) - inserted_by_job.get(fp, 0) for fp in fingerprints}
+
+                new_expenses = []
+                for expense in candidates:
+                    fp = expense.fingerprint
+                    seen_in_file[fp] = seen_in_file.get(fp, 0) + 1
+                    if seen_in_file[fp] > existed_before[fp]:
+                        new_expenses.append(expense)
+                        inserted_by_job[fp] = inserted_by_job.get(fp, 0) + 1
+
+                with transaction.atomic():
+                    Expense.objects.bulk_create(new_expenses, batch_size=500)
+                    apply_expense_changes((None, expense.snapshot()) for expense in new_expenses)
+
+                ImportJob.objects.filter(id=job.id).update(
+                    bytes_read=raw.tell(),
+                    rows_processed=F('rows_processed') + len(chunk),
+                    rows_imported=F('rows_imported') + len(new_expenses),
+                    rows_duplicate=F('rows_duplicate') + len(candidates) - len(new_expenses),
+                    rows_skipped=F('rows_skipped') + skipped,
+                    errors=errors,
+                )
+
+    except Exception as e:
+        ImportJob.objects.filter(id=job.id).update(status='failed', errors=errors + [{"line": None, "error": str(e)}], finished_at=now())
+        return f"Import {job_id} failed: {e}"
+
+    ImportJob.objects.filter(id=job.id).update(status='completed', bytes_read=F('bytes_total'), finished_at=now())
+    return f"Import {job_id} completed"
+
+
+@shared_task
+def ensure_expense_partitions():
+    """
+    Keep expense_expense partitions created ahead of today, once the table is partitioned.
+    """
+    from .partitioning import ensure_partitions, is_partitioned
+
+    if connection.vendor != 'postgresql' or not is_partitioned():
+        return "expense_expense is not partitioned"
+    created = ensure_partitions()
+    return f"Created partitions: {', '.join(created)}" if created else "Partitions up to date"
+
+
+@shared_task
+def purge_expense_tombstones():
+    from .changes import purge_tombstones
+
+    return f"Purged {purge_tombstones()} expense tombstones"
+
+
+@shared_task
+def reconcile_spend_rollups(hours=25):
+    """
+    Repair the spend rollups of every user whose expenses changed in the last ``hours``.
+    """
+    since = now() - timedelta(hours=hours)
+    user_ids = set(Expense.objects.filter(updated_at__gte=since).values_list('user_id', flat=True).distinct())
+    user_ids |= set(ExpenseTombstone.objects.filter(deleted_at__gte=since).values_list('user_id', flat=True).distinct())
+
+    drifted, skipped = 0, []
+    for user_id in sorted(user_ids):
+        try:
+            drifted += reconcile_user_rollups(user_id)
+        except IntegrityError:
+            # Kept colliding with live writes; the next run picks the user up again
+            skipped.append(user_id)
+
+    result = f"Reconciled rollups for {len(user_ids) - len(skipped)} users; repaired {drifted} rows"
+    if skipped:
+        result += f"; skipped users {', '.join(map(str, skipped))}"
+    return result
+
+
+@shared_task
+def detect_spend_anomalies(batch_size=500):
+    """
+    Flag unusually large expenses created or edited since the last run.
+    """
+    from .anomalies import detect_anomalies
+
+    users, flagged = detect_anomalies(batch_size=batch_size)
+    return f"Scanned changes for {users} users; flagged {flagged} expenses"
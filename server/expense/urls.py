@@ -1,7 +1,20 @@
 from django.urls import path
-from .views import expense_list, expense_detail
+from .views import expense_list, expense_detail, expense_bulk_create, expense_export
+from .views import import_list, import_detail, category_budgets
+from .views import expense_bulk_update, expense_bulk_delete, expense_search, expense_change_feed
+from .views import expense_anomalies
 
 urlpatterns = [
     path('', expense_list, name='expense-list'),
+    path('bulk/', expense_bulk_create, name='expense-bulk-create'),
+    path('bulk/update/', expense_bulk_update, name='expense-bulk-update'),
+    path('bulk/delete/', expense_bulk_delete, name='expense-bulk-delete'),
+    path('export/', expense_export, name='expense-export'),
+    path('search/', expense_search, name='expense-search'),
+    path('changes/', expense_change_feed, name='expense-changes'),
+    path('anomalies/', expense_anomalies, name='expense-anomalies'),
+    path('budgets/', category_budgets, name='expense-category-budgets'),
+    path('imports/', import_list, name='expense-import-list'),
+    path('imports/<uuid:job_id>/', import_detail, name='expense-import-detail'),
     path('<int:pk>/', expense_detail, name='expense-detail'),
 ]
@@ -0,0 +1,44 @@
+"""
+Per-user data version for caches derived from a user's expenses.
+
+Every write that changes a user's expense totals bumps the version once the
+transaction commits. Cached results are keyed by it, so a write makes every
+older entry unreachable and no TTL has to guess at staleness. A version
+that is missing, e.g. evicted, is re-seeded from the clock rather than
+restarting at 1, so it can never collide with an older value.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _key(user_id):
+    return f"expense:data-version:{user_id}"
+
+
+def get_data_version(user_id):
+    key = _key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(user_ids):
+    """
+    Invalidate cached results for ``user_ids`` after the current transaction commits.
+    """
+    user_ids = set(user_ids)
+
+    def bump():
+        for user_id in user_ids:
+            key = _key(user_id)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, time.time_ns(), timeout=None)
+
+    # Bumping before commit would let a reader cache pre-commit data under the new version
+    transaction.on_commit(bump)
@@ -2,23 +2,63 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Expense
-from .serializers import ExpenseSerializer
+from .models import Expense, ImportJob, CategoryBudget, BudgetAlertState, ExpenseAnomaly
+from .serializers import ExpenseBulkIdsSerializer, ExpenseBulkPatchSerializer, ExpenseAnomalySerializer
+from .serializers import ExpenseSerializer, ExpenseValuesSerializer, ExpenseBulkItemSerializer, ImportJobSerializer, CategoryBudgetSerializer
+from .pagination import paginate_expenses, get_page_size, InvalidCursor
 
-from datetime import datetime
 from users.models import UserProfile
-from expense.tasks import send_budget_alert_email_task
+from .alerts import evaluate_budget_alerts, get_thresholds, rearm_budget_alerts
+from .idempotency import idempotent
+from .rollups import month_start
+from .rollups import apply_expense_changes
+from .bulk import bulk_update_expenses, bulk_delete_expenses
+from .search import search_expenses, SEARCH_MODES, SEARCH_SCOPES
+from .changes import expense_changes, CursorExpired
+from expense.tasks import import_bank_statement
+from .filters import filter_expenses
+from .export import stream_csv, stream_ndjson
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.timezone import localdate, now
+import os
 
 
 
 # Get all expenses or create a new one
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
+@idempotent('expense-create')
 def expense_list(request):
     if request.method == "GET":
         expenses = Expense.objects.filter(user=request.user)
-        serializer = ExpenseSerializer(expenses, many=True)
-        return Response(serializer.data)
+        try:
+            fast = ExpenseValuesSerializer.from_query_param(request.query_params.get("fields"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Legacy unpaginated list, kept while the dashboard migrates
+        if request.query_params.get("all") in ("1", "true"):
+            return Response(fast.serialize(expenses.values_list(*fast.columns)))
+
+        # date and id ride along after the requested columns to build the cursor
+        rows_qs = expenses.values_list(*fast.columns, "date", "id")
+        try:
+            rows, next_cursor, has_more = paginate_expenses(
+                rows_qs,
+                cursor=request.query_params.get("cursor"),
+                page_size=get_page_size(request),
+                key=lambda row: (row[-2], row[-1]),
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "results": fast.serialize(rows),
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        })
 
     if request.method == "POST":
         data = request.data.copy()
@@ -29,16 +69,6 @@ def expense_list(request):
         if serializer.is_valid():
             
             try:
-                 # Calculate total expenses for the current month
-                 current_month = datetime.now().month
-                 current_year = datetime.now().year
-                 total_expenses = sum(
-                 exp.amount for exp in Expense.objects.filter(
-                    user=request.user,
-                    date__month=current_month,
-                    date__year=current_year
-                )
-            )
                  user_profile = UserProfile.objects.get(user=request.user)
                  serializer.save()
             except UserProfile.DoesNotExist:
@@ -47,19 +77,8 @@ def expense_list(request):
                 {"detail": "User profile not found. Please update your profile."},
                 status=status.HTTP_422_UNPROCESSABLE_ENTITY
             )
-            # user_profile = UserProfile.objects.get(user=request.user)
-            print("Total expenses for the month:", total_expenses , "Monthly budget:", user_profile.monthly_budget)
-            # Check if total exceeds budget
-            if total_expenses > user_profile.monthly_budget:
-                print("Total expenses exceed budget!")
-                # Send email asynchronously using thread
-                send_budget_alert_email_task.delay(
-                    request.user.email,
-                    request.user.username,
-                    total_expenses,
-                    user_profile.monthly_budget
-                )
-
+            # Alert only on newly crossed budget thresholds, read from the rollup the save just updated
+            evaluate_budget_alerts(request.user, user_profile)
 
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -67,6 +86,256 @@ def expense_list(request):
 
 
 
+# Create many expenses in one request
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def expense_bulk_create(request):
+    items = request.data.get("expenses") if isinstance(request.data, dict) else request.data
+    if not isinstance(items, list) or not items:
+        return Response({"error": "Expected a non-empty list of expenses."}, status=status.HTTP_400_BAD_REQUEST)
+
+    max_items = getattr(settings, "EXPENSE_BULK_MAX_ITEMS", 1000)
+    if len(items) > max_items:
+        return Response({"error": f"At most {max_items} expenses per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = ExpenseBulkItemSerializer(data=items, many=True)
+    if not serializer.is_valid():
+        errors = [
+            {"index": index, "errors": item_errors}
+            for index, item_errors in enumerate(serializer.errors) if item_errors
+        ]
+        return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        user_profile = UserProfile.objects.get(user=request.user)
+    except UserProfile.DoesNotExist:
+        return Response(
+            {"detail": "User profile not found. Please update your profile."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    expenses = [Expense(user=request.user, **item) for item in serializer.validated_data]
+    for expense in expenses:
+        expense.refresh_fingerprint()  # save() is bypassed by bulk_create
+    with transaction.atomic():
+        # bulk_create skips the save signals, so update the rollups for the batch here
+        Expense.objects.bulk_create(expenses, batch_size=500)
+        apply_expense_changes((None, expense.snapshot()) for expense in expenses)
+
+    # One budget evaluation for the whole batch
+    evaluate_budget_alerts(request.user, user_profile)
+
+    return Response(ExpenseSerializer(expenses, many=True).data, status=status.HTTP_201_CREATED)
+
+
+
+# Recategorise many expenses with one UPDATE
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def expense_bulk_update(request):
+    serializer = ExpenseBulkPatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    patch = dict(serializer.validated_data)
+    ids = patch.pop("ids")
+    updated = bulk_update_expenses(request.user, ids, patch)
+    # Category limits may have been crossed by moving spend between categories
+    evaluate_budget_alerts(request.user, UserProfile.objects.filter(user=request.user).first())
+
+    return Response({
+        "updated": len(updated),
+        "not_found": sorted(set(ids) - set(updated)),
+    })
+
+
+# Delete many expenses with one DELETE
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def expense_bulk_delete(request):
+    serializer = ExpenseBulkIdsSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    ids = serializer.validated_data["ids"]
+    deleted = bulk_delete_expenses(request.user, ids)
+    return Response({
+        "deleted": len(deleted),
+        "not_found": sorted(set(ids) - set(deleted)),
+    })
+
+
+
+# Changes since the client's last sync: updated rows plus ids of deleted ones
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def expense_change_feed(request):
+    try:
+        fast = ExpenseValuesSerializer.from_query_param(request.query_params.get("fields"))
+        updated, deleted, next_cursor, has_more = expense_changes(
+            request.user,
+            fast.columns,
+            cursor=request.query_params.get("since"),
+            limit=get_page_size(request),
+        )
+    except CursorExpired as e:
+        return Response({"error": str(e), "resync": True}, status=status.HTTP_410_GONE)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        "updated": fast.serialize(updated),
+        "deleted": deleted,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    })
+
+
+
+# Expenses flagged as unusually large by the nightly anomaly job, newest first
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def expense_anomalies(request):
+    anomalies = list(
+        ExpenseAnomaly.objects.filter(user=request.user).order_by("-detected_at", "-id")[:get_page_size(request)]
+    )
+    expenses = Expense.objects.filter(user=request.user).in_bulk([anomaly.expense_id for anomaly in anomalies])
+
+    # Expenses deleted since the last run are dropped here until it cleans them up
+    flagged = []
+    for anomaly in anomalies:
+        if anomaly.expense_id in expenses:
+            anomaly.expense = expenses[anomaly.expense_id]
+            flagged.append(anomaly)
+    return Response({"results": ExpenseAnomalySerializer(flagged, many=True).data})
+
+
+
+# Ranked search over personal and group expense descriptions
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def expense_search(request):
+    q = request.query_params.get("q", "").strip()
+    mode = request.query_params.get("mode", "fts")
+    scope = request.query_params.get("scope", "all")
+    if not q:
+        return Response({"error": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+    if mode not in SEARCH_MODES or scope not in SEARCH_SCOPES:
+        return Response(
+            {"error": f"mode must be one of {SEARCH_MODES} and scope one of {SEARCH_SCOPES}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        page = max(1, int(request.query_params.get("page", 1)))
+    except ValueError:
+        page = 1
+    page_size = min(get_page_size(request), 100)
+
+    results, has_more = search_expenses(
+        request.user, q, mode=mode, scope=scope, offset=(page - 1) * page_size, limit=page_size
+    )
+    return Response({"results": results, "page": page, "has_more": has_more})
+
+
+
+# Stream the user's expenses as CSV or NDJSON
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def expense_export(request):
+    # ?type= rather than ?format=, which DRF reserves for renderer selection
+    export_type = request.query_params.get("type", "csv")
+    if export_type not in ("csv", "ndjson"):
+        return Response({"error": "type must be 'csv' or 'ndjson'."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        expenses = filter_expenses(Expense.objects.filter(user=request.user), request.query_params)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if export_type == "csv":
+        response = StreamingHttpResponse(stream_csv(expenses), content_type="text/csv")
+    else:
+        response = StreamingHttpResponse(stream_ndjson(expenses), content_type="application/x-ndjson")
+
+    filename = f"expenses-{now().date().isoformat()}.{export_type}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+
+# Upload a bank statement for background import, or list past imports
+@api_view(["GET", "POST"])
+@permission_classes([IsAuthenticated])
+def import_list(request):
+    if request.method == "GET":
+        jobs = ImportJob.objects.filter(user=request.user)[:50]
+        return Response(ImportJobSerializer(jobs, many=True).data)
+
+    upload = request.FILES.get("file")
+    if not upload:
+        return Response({"error": "No file provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = request.data.copy()
+    data.pop("file", None)
+    if not data.get("format"):
+        extension = os.path.splitext(upload.name)[1].lower()
+        data["format"] = "ofx" if extension in (".ofx", ".qfx") else "csv"
+    if data.get("column_map") == "":
+        # An empty form field means no overrides; the serializer parses any other value
+        data.pop("column_map")
+
+    serializer = ImportJobSerializer(data=data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    job = serializer.save(user=request.user, file=upload)
+    transaction.on_commit(lambda: import_bank_statement.delay(str(job.id)))
+    return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def import_detail(request, job_id):
+    try:
+        job = ImportJob.objects.get(id=job_id, user=request.user)
+    except ImportJob.DoesNotExist:
+        return Response({"error": "Import not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(ImportJobSerializer(job).data)
+
+
+
+# Per-category monthly limits and this month's alert levels
+@api_view(["GET", "PUT"])
+@permission_classes([IsAuthenticated])
+def category_budgets(request):
+    if request.method == "PUT":
+        serializer = CategoryBudgetSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # The submitted list replaces the user's limits
+            previous = dict(CategoryBudget.objects.filter(user=request.user).values_list("category", "monthly_limit"))
+            CategoryBudget.objects.filter(user=request.user).delete()
+            CategoryBudget.objects.bulk_create(
+                CategoryBudget(user=request.user, **item) for item in serializer.validated_data
+            )
+            limits = {item["category"]: item["monthly_limit"] for item in serializer.validated_data}
+            rearm_budget_alerts(request.user, [
+                category for category in previous.keys() | limits.keys() if previous.get(category) != limits.get(category)
+            ])
+
+    budgets = CategoryBudget.objects.filter(user=request.user).order_by("category")
+    alerts = BudgetAlertState.objects.filter(user=request.user, month=month_start(localdate()))
+    return Response({
+        "budgets": CategoryBudgetSerializer(budgets, many=True).data,
+        "thresholds": get_thresholds(),
+        "alerts_sent": {state.scope: state.threshold for state in alerts},
+    })
+
+
+
 # Retrieve, update, or delete an expense
 @api_view(["GET", "PUT", "DELETE"])
 @permission_classes([IsAuthenticated])
@@ -88,6 +357,7 @@ def expense_detail(request, pk):
         serializer = ExpenseSerializer(expense, data=data)
         if serializer.is_valid():
             serializer.save()
+            evaluate_budget_alerts(request.user, UserProfile.objects.filter(user=request.user).first())
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
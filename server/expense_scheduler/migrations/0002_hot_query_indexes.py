@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:47
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('expense_scheduler', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='expenseschedule',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['next_occurrence'], name='schedule_active_next_idx'),
+        ),
+    ]
@@ -35,6 +35,16 @@ class ExpenseSchedule(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # The daily run only ever looks at active schedules that are due
+            models.Index(
+                fields=['next_occurrence'],
+                name='schedule_active_next_idx',
+                condition=models.Q(is_active=True),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.username}'s {self.name} ({self.frequency})"
 
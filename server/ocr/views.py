@@ -1,28 +1,21 @@
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
-import pytesseract
-from PIL import Image
 import logging
-import google.generativeai as genai
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from decouple import config
 import re
 
+from server import lazy
 
 
 
-logger = logging.getLogger(__name__)
-
-api_key = config('API_KEY')
 
-# Configure Gemini API
-genai.configure(api_key=api_key)
+logger = logging.getLogger(__name__)
 
-# Initialize the GenerativeModel
-# model = genai.GenerativeModel('gemini-1.5-pro')
-model = genai.GenerativeModel('gemini-2.0-flash')
+# Gemini, pytesseract and PIL are loaded on the first OCR request (see server/lazy.py)
+# GEMINI_MODEL = 'gemini-1.5-pro'
+GEMINI_MODEL = 'gemini-2.0-flash'
 
 
 
@@ -45,7 +38,7 @@ def extract_receipt_data_with_gemini(receipt_text):
 
 
     try:
-        response = model.generate_content(prompt)
+        response = lazy.gemini_model(GEMINI_MODEL).generate_content(prompt)
         print(f"Gemini Response: {response}")
 
         # Extract raw text
@@ -97,7 +90,7 @@ def receipt_ocr_api(request):
                 return JsonResponse({'error': 'No image provided'}, status=400)
 
             # Perform OCR on the uploaded image
-            extracted_text = pytesseract.image_to_string(Image.open(image_file))
+            extracted_text = lazy.get('pytesseract').image_to_string(lazy.get('PIL.Image').open(image_file))
             logger.info(f"Extracted Text: {extracted_text}")
             print(f"Extracted Text: {extracted_text}")
             # Process the text with Gemini AI to extract structured data
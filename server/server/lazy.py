@@ -0,0 +1,79 @@
+"""
+Registry of heavy third-party modules and clients, created on first use.
+
+Importing google.generativeai, qrcode, PIL or pandas costs every gunicorn and
+Celery worker start-up time and memory, even when the process never serves
+the routes that need them. Register a factory here, or with ``@register`` next
+to the code that uses it, and call ``get(name)`` where it is needed. The
+factory runs once per process, on first ``get``.
+
+``manage.py bench_startup`` checks that none of these are imported by
+``server.wsgi`` or the Celery worker at start-up.
+"""
+import importlib
+import threading
+
+_factories = {}
+_instances = {}
+_lock = threading.Lock()
+
+
+def register(name, factory=None):
+    """
+    Register ``factory`` under ``name``. Can also be used as a decorator:
+    ``@register("name")``.
+    """
+    if factory is None:
+        return lambda fn: register(name, fn)
+    _factories[name] = factory
+    return factory
+
+
+def get(name):
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _instances:
+            _instances[name] = _factories[name]()
+    return _instances[name]
+
+
+def loaded():
+    """Names whose factories have run in this process."""
+    return sorted(_instances)
+
+
+def register_module(name, module=None):
+    register(name, lambda: importlib.import_module(module or name))
+
+
+@register("genai")
+def _genai():
+    # Configured once per process with the project's API key
+    import google.generativeai as genai
+    from decouple import config
+
+    genai.configure(api_key=config('API_KEY'))
+    return genai
+
+
+def gemini_model(model_name):
+    """
+    The shared GenerativeModel for ``model_name``.
+    """
+    name = f"gemini:{model_name}"
+    if name not in _factories:
+        register(name, lambda: get("genai").GenerativeModel(model_name))
+    return get(name)
+
+
+register_module("qrcode")
+register_module("numpy")
+register_module("pytesseract")
+register_module("PIL.Image")
+
+
+# Modules the start-up benchmark reports if a process imports them eagerly
+HEAVY_MODULES = ("google.generativeai", "qrcode", "pandas", "numpy", "pytesseract", "PIL.Image")
@@ -0,0 +1,33 @@
+"""
+Short-lived locks in the shared cache.
+
+A lock holds a random token. ``release`` deletes it only while that token is
+still there, so a holder that outlived the timeout cannot free a lock that a
+later caller has since taken. The check and the delete are two cache calls;
+a lock expiring between them can still be freed, but only in that window.
+"""
+import time
+import uuid
+
+from django.core.cache import cache
+
+POLL_INTERVAL = 0.02
+
+
+def acquire(key, timeout, wait=0, poll=POLL_INTERVAL):
+    """
+    Take the lock at ``key`` for ``timeout`` seconds, retrying for up to
+    ``wait`` seconds. Returns the token to release it with, or None.
+    """
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    while not cache.add(key, token, timeout=timeout):
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(poll)
+    return token
+
+
+def release(key, token):
+    if token is not None and cache.get(key) == token:
+        cache.delete(key)
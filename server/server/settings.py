@@ -1,6 +1,7 @@
 
 from datetime import timedelta
 from decouple import config
+from corsheaders.defaults import default_headers
 
 from pathlib import Path
 
@@ -30,6 +31,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -75,6 +77,10 @@ CORS_ALLOW_CREDENTIALS = True  # Allow cookies and authentication
 # If you want to allow all origins (not recommended for production)
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Retried POSTs carry an Idempotency-Key; replays are flagged in the response
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed"]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -100,6 +106,28 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Cursor pagination for GET /expense/
+EXPENSE_PAGE_SIZE = 50
+EXPENSE_MAX_PAGE_SIZE = 500
+# Largest batch accepted by POST /expense/bulk/
+EXPENSE_BULK_MAX_ITEMS = 1000
+# Percent-of-budget levels that trigger an alert, once each per budget per month
+BUDGET_ALERT_THRESHOLDS = [50, 80, 100]
+# Range partitioning of expense_expense ('year' or 'month'), see expense/partitioning.py
+EXPENSE_PARTITION_INTERVAL = 'year'
+# How many partitions past the current one the daily task keeps ready
+EXPENSE_PARTITIONS_AHEAD = 2
+# GET /expense/changes/: serve only changes at least this old, so late commits aren't skipped
+EXPENSE_CHANGES_SETTLE_SECONDS = 5
+# Deletion tombstones are purged after this; older sync cursors must resync
+EXPENSE_TOMBSTONE_RETENTION_DAYS = 90
+# Anomaly detection: amounts kept per user and category, the fewest worth
+# scoring against, robust z-score to flag at, and the first run's look-back
+ANOMALY_WINDOW_SIZE = 100
+ANOMALY_MIN_HISTORY = 8
+ANOMALY_THRESHOLD = 5.0
+ANOMALY_BOOTSTRAP_DAYS = 365
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
@@ -204,12 +232,25 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = config('EMAIL_HOST_USER')  
 COMPANY_NAME= "Xpenzo"  # Replace with your company name
 
+# Shared by every worker: idempotency keys and password reset tokens must be
+# visible to whichever process handles the next request
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config('REDIS_CACHE_URL', default='redis://localhost:6379/1'),
     }
 }
+# How long a response is replayed for a repeated Idempotency-Key (seconds)
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+# Lock held while the first request with a key runs; duplicates wait up to this long
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+# Analytics results are invalidated by data version; this only evicts dead entries
+CHARTS_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+# Month-end forecast: simulated paths, days of history resampled, and the least
+# history worth forecasting from
+FORECAST_PATHS = 5000
+FORECAST_HISTORY_DAYS = 90
+FORECAST_MIN_HISTORY_DAYS = 14
 
 # Celery configuration
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
@@ -5,3 +5,6 @@ class SplitConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'split'
 
+    def ready(self):
+        # Keep the GroupBalance ledger in step with every split and settlement write
+        from . import signals  # noqa: F401
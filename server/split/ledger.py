@@ -0,0 +1,161 @@
+"""
+Running per-group ledger of who owes whom, kept in step with every
+ExpenseSplit and Settlement write (see split.signals).
+
+Each GroupBalance row holds what one member still owes another in a group:
+their open (pending or requested) splits on expenses the other paid, less the
+settled payments between them. Writes apply exact deltas in the writer's
+transaction, so reading a group's balances never has to scan its splits.
+``verify_group`` recomputes the ledger from the raw rows and reports or
+repairs any drift.
+"""
+from collections import defaultdict, namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils.timezone import now
+
+# The fields of a split or settlement that the ledger depends on
+SplitRow = namedtuple("SplitRow", "expense_id user_id status amount_owed")
+SettlementRow = namedtuple("SettlementRow", "group_id from_user_id to_user_id status amount")
+
+OPEN_SPLIT_STATUSES = ("pending", "requested")
+REQUESTED = "requested"
+SETTLED = "settled"
+CENT = Decimal("0.01")
+
+
+def to_cents(amount):
+    # The database rounds half away from zero when storing two decimal places
+    return Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def apply_ledger_changes(split_changes=(), settlement_changes=()):
+    """
+    Apply a batch of split and settlement writes to the ledger.
+
+    Both arguments are iterables of ``(old, new)`` row pairs as in
+    expense.rollups.apply_expense_changes: ``(None, row)`` for an insert,
+    ``(row, None)`` for a delete. Deltas are merged per (group, debtor,
+    creditor) first, then applied in sorted order.
+    """
+    from .models import GroupExpense
+
+    split_changes = list(split_changes)
+    expense_ids = {row.expense_id for pair in split_changes for row in pair if row is not None}
+    payers = {
+        expense_id: (group_id, paid_by_id)
+        for expense_id, group_id, paid_by_id in GroupExpense.objects.filter(id__in=expense_ids)
+        .values_list("id", "group_id", "paid_by_id")
+    }
+
+    deltas = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+    for old, new in split_changes:
+        for row, sign in ((old, -1), (new, 1)):
+            if row is None or row.status not in OPEN_SPLIT_STATUSES:
+                continue
+            group_id, payer_id = payers[row.expense_id]
+            # A payer's own share isn't owed to anyone
+            if row.user_id == payer_id:
+                continue
+            delta = deltas[(group_id, row.user_id, payer_id)]
+            delta[0] += sign * row.amount_owed
+            if row.status == REQUESTED:
+                delta[1] += sign * row.amount_owed
+
+    for old, new in settlement_changes:
+        for row, sign in ((old, -1), (new, 1)):
+            if row is None or row.status != SETTLED:
+                continue
+            deltas[(row.group_id, row.from_user_id, row.to_user_id)][0] -= sign * row.amount
+
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        for (group_id, debtor_id, creditor_id), (amount, requested) in sorted(deltas.items()):
+            if amount == 0 and requested == 0:
+                continue
+            _add_to_ledger(
+                {"group_id": group_id, "debtor_id": debtor_id, "creditor_id": creditor_id}, amount, requested
+            )
+
+
+def _add_to_ledger(key, amount, requested):
+    from .models import GroupBalance
+
+    changes = {"amount": F("amount") + amount, "requested": F("requested") + requested, "updated_at": now()}
+    if GroupBalance.objects.filter(**key).update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            GroupBalance.objects.create(**key, amount=amount, requested=requested)
+    except IntegrityError:
+        # Another writer created the row first; add to theirs
+        GroupBalance.objects.filter(**key).update(**changes)
+
+
+def expected_balances(group):
+    """
+    The ledger for ``group`` recomputed from its splits and settlements:
+    {(debtor_id, creditor_id): (amount, requested)}.
+    """
+    from .models import Settlement
+    from .utils import open_debts
+
+    expected = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+    for (debtor, creditor, split_status), total in open_debts(group).items():
+        expected[(debtor, creditor)][0] += total
+        if split_status == REQUESTED:
+            expected[(debtor, creditor)][1] += total
+
+    settled = (
+        Settlement.objects.filter(group=group, status=SETTLED)
+        .values("from_user_id", "to_user_id").annotate(total=Sum("amount")).order_by()
+        .values_list("from_user_id", "to_user_id", "total")
+    )
+    for debtor, creditor, total in settled:
+        expected[(debtor, creditor)][0] -= total
+
+    return {key: tuple(values) for key, values in expected.items() if any(values)}
+
+
+def verify_group(group, fix=False):
+    """
+    Compare the ledger for ``group`` with what its raw rows add up to.
+    Returns the drifted pairs as (debtor_id, creditor_id, ledger, expected),
+    where ledger and expected are (amount, requested). With ``fix`` the
+    ledger rows are rewritten to match.
+    """
+    from .models import GroupBalance
+
+    with transaction.atomic():
+        rows = GroupBalance.objects.filter(group=group)
+        if fix:
+            # Lock first so writes landing during the recompute wait for it
+            rows = rows.select_for_update()
+        current = {(row.debtor_id, row.creditor_id): row for row in rows}
+        expected = expected_balances(group)
+
+        drifted, missing, changed = [], [], []
+        for key in sorted(set(current) | set(expected)):
+            row = current.get(key)
+            actual = (row.amount, row.requested) if row else (Decimal("0"), Decimal("0"))
+            wanted = expected.get(key, (Decimal("0"), Decimal("0")))
+            if actual == wanted:
+                continue
+            drifted.append((*key, actual, wanted))
+            if row is None:
+                missing.append(GroupBalance(group=group, debtor_id=key[0], creditor_id=key[1],
+                                            amount=wanted[0], requested=wanted[1]))
+            else:
+                row.amount, row.requested = wanted
+                changed.append(row)
+
+        if fix:
+            GroupBalance.objects.bulk_create(missing, batch_size=2000)
+            GroupBalance.objects.bulk_update(changed, ["amount", "requested"], batch_size=2000)
+
+    return drifted
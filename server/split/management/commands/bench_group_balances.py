@@ -0,0 +1,140 @@
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+
+from split.models import ExpenseGroup, ExpenseSplit, GroupExpense, GroupMember
+from split.ledger import verify_group
+from split.utils import calculate_balances, open_debts, simplify_balances
+
+
+def row_by_row_balances(group):
+    """The previous split.utils.calculate_balances loop, kept as the baseline."""
+    balances = defaultdict(float)
+    for split in ExpenseSplit.objects.filter(expense__group=group).exclude(status=ExpenseSplit.Status.CONFIRMED):
+        balances[(split.user.id, split.expense.paid_by.id)] += float(split.amount_owed)
+
+    net_balances = defaultdict(float)
+    for (debtor, creditor), amount in balances.items():
+        net_balances[debtor] -= amount
+        net_balances[creditor] += amount
+    return net_balances
+
+
+def measure(repeat, fn):
+    """Best wall time over ``repeat`` runs and the queries one run issues."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    # The timed runs may have filled the query log when DEBUG is on
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        fn()
+    count = len(queries)
+    # Django only keeps the last queries_limit queries
+    return min(timings), f"{count}+" if count >= connection.queries_limit else str(count)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Time group balance computation and debt simplification on a large group."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--group", help="Benchmark an existing group (UUID) instead of seeding one.")
+        parser.add_argument("--members", type=int, default=300)
+        parser.add_argument("--splits", type=int, default=30000, help="Splits to seed across the group's expenses.")
+        parser.add_argument("--split-size", type=int, default=10, help="Members sharing each seeded expense.")
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--skip-baseline", action="store_true", help="Don't time the row-by-row loop.")
+
+    def handle(self, *args, **options):
+        if options["group"]:
+            try:
+                group = ExpenseGroup.objects.get(id=options["group"])
+            except (ExpenseGroup.DoesNotExist, ValidationError):
+                raise CommandError(f"Group {options['group']} does not exist.")
+            self.run(group, options)
+            return
+
+        if options["split_size"] > options["members"]:
+            raise CommandError("--split-size can't exceed --members.")
+
+        # Seed inside a transaction that is always rolled back
+        try:
+            with transaction.atomic():
+                group = self.seed(options["members"], options["splits"], options["split_size"])
+                self.run(group, options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def seed(self, members, splits, split_size):
+        rng = random.Random(42)
+        prefix = f"bench-split-{time.time_ns()}"
+        users = User.objects.bulk_create(User(username=f"{prefix}-{i}") for i in range(members))
+        group = ExpenseGroup.objects.create(group_name=prefix, created_by=users[0])
+        GroupMember.objects.bulk_create(GroupMember(group=group, user=user) for user in users)
+
+        expenses, rows = [], []
+        statuses = [ExpenseSplit.Status.PENDING] * 7 + [ExpenseSplit.Status.REQUESTED] + [ExpenseSplit.Status.CONFIRMED] * 2
+        for _ in range(splits // split_size):
+            sharers = rng.sample(users, split_size)
+            share = Decimal(rng.randint(100, 100000)) / 100
+            expense = GroupExpense(
+                group=group, paid_by=rng.choice(sharers), amount=share * split_size,
+                date=date.today() - timedelta(days=rng.randint(0, 365)), payment_method='upi',
+            )
+            expenses.append(expense)
+            rows.extend(
+                ExpenseSplit(expense=expense, user=user, amount_owed=share, status=rng.choice(statuses))
+                for user in sharers
+            )
+        GroupExpense.objects.bulk_create(expenses, batch_size=2000)
+        ExpenseSplit.objects.bulk_create(rows, batch_size=5000)
+        # bulk_create skips the ledger signals; build the ledger in one pass
+        verify_group(group, fix=True)
+        self.stdout.write(f"Seeded {members} members, {len(expenses)} expenses, {len(rows)} splits.")
+        return group
+
+    def run(self, group, options):
+        repeat = options["repeat"]
+        self.stdout.write(f"group {group.id}: {ExpenseSplit.objects.filter(expense__group=group).count()} splits")
+        self.stdout.write(f"{'step':<22}  {'time (s)':>9}  {'queries':>7}")
+
+        steps = [
+            ("aggregated splits", lambda: open_debts(group)),
+            ("ledger balances", lambda: calculate_balances(group)),
+        ]
+        if not options["skip_baseline"]:
+            steps.insert(0, ("row-by-row balances", lambda: row_by_row_balances(group)))
+        for label, fn in steps:
+            elapsed, queries = measure(repeat, fn)
+            self.stdout.write(f"{label:<22}  {elapsed:>9.3f}  {queries:>7}")
+
+        debts = open_debts(group)
+        net = defaultdict(Decimal)
+        pairs = set()
+        for (debtor, creditor, _), amount in debts.items():
+            net[debtor] -= amount
+            net[creditor] += amount
+            pairs.add((debtor, creditor))
+        elapsed, _ = measure(repeat, lambda: simplify_balances(net))
+        transfers = simplify_balances(net)
+        self.stdout.write(f"{'simplify':<22}  {elapsed:>9.3f}  {'0':>7}")
+        self.stdout.write(
+            f"{len(pairs)} debtor/creditor pairs settled in {len(transfers)} transfers "
+            f"({sum(1 for balance in net.values() if balance)} members with a balance)"
+        )
@@ -0,0 +1,36 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from split.ledger import verify_group
+from split.models import ExpenseGroup
+
+
+class Command(BaseCommand):
+    help = "Recompute the group balance ledger from raw splits and settlements and report any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--group", action="append", dest="groups", help="Only these group ids (repeatable).")
+        parser.add_argument("--fix", action="store_true", help="Rewrite drifted ledger rows to match.")
+
+    def handle(self, *args, **options):
+        groups = ExpenseGroup.objects.order_by("created_at")
+        if options["groups"]:
+            try:
+                groups = groups.filter(id__in=options["groups"])
+            except ValidationError:
+                raise CommandError("--group must be a group UUID.")
+
+        checked = drifted = 0
+        for group in groups.iterator():
+            checked += 1
+            for debtor, creditor, ledger, expected in verify_group(group, fix=options["fix"]):
+                drifted += 1
+                self.stdout.write(
+                    f"group {group.id}: {debtor} -> {creditor} ledger {ledger[0]} (requested {ledger[1]}), "
+                    f"expected {expected[0]} (requested {expected[1]})"
+                )
+
+        summary = f"Checked {checked} groups; {drifted} drifted ledger rows"
+        if drifted and not options["fix"]:
+            raise CommandError(f"{summary}. Run with --fix to repair them.")
+        self.stdout.write(self.style.SUCCESS(f"{summary}{' repaired' if drifted else ''}."))
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:47
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('split', '0005_remove_expensegroup_avatar_expensegroup_avatar_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='expensesplit',
+            index=models.Index(fields=['user', 'status'], name='split_user_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='expensesplit',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'requested'])), fields=['expense', 'user'], name='split_open_expense_user_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:56
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('split', '0007_search'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='groupexpense',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='groupexpense_search_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='groupexpense',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['description'], name='groupexpense_desc_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
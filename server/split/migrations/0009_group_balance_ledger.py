@@ -0,0 +1,68 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_group_balances(apps, schema_editor):
+    ExpenseSplit = apps.get_model('split', 'ExpenseSplit')
+    Settlement = apps.get_model('split', 'Settlement')
+    GroupBalance = apps.get_model('split', 'GroupBalance')
+
+    ledger = {}
+    splits = (
+        ExpenseSplit.objects.filter(status__in=['pending', 'requested'])
+        .exclude(user_id=models.F('expense__paid_by_id'))
+        .values('expense__group_id', 'user_id', 'expense__paid_by_id', 'status')
+        .annotate(total=models.Sum('amount_owed')).order_by()
+    )
+    for row in splits.iterator(chunk_size=2000):
+        key = (row['expense__group_id'], row['user_id'], row['expense__paid_by_id'])
+        amount, requested = ledger.get(key, (0, 0))
+        ledger[key] = (amount + row['total'], requested + (row['total'] if row['status'] == 'requested' else 0))
+
+    settled = (
+        Settlement.objects.filter(status='settled')
+        .values('group_id', 'from_user_id', 'to_user_id').annotate(total=models.Sum('amount')).order_by()
+    )
+    for row in settled.iterator(chunk_size=2000):
+        key = (row['group_id'], row['from_user_id'], row['to_user_id'])
+        amount, requested = ledger.get(key, (0, 0))
+        ledger[key] = (amount - row['total'], requested)
+
+    GroupBalance.objects.bulk_create(
+        (
+            GroupBalance(group_id=group_id, debtor_id=debtor_id, creditor_id=creditor_id,
+                         amount=amount, requested=requested)
+            for (group_id, debtor_id, creditor_id), (amount, requested) in ledger.items()
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('split', '0008_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('requested', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('creditor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('debtor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='split.expensegroup')),
+            ],
+            options={
+                'unique_together': {('group', 'debtor', 'creditor')},
+            },
+        ),
+        migrations.RunPython(backfill_group_balances, migrations.RunPython.noop),
+    ]
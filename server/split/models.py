@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
 import uuid
-from expense.models import Expense
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from expense.models import Expense, SEARCH_CONFIG
+from .ledger import SettlementRow, SplitRow, to_cents
 
 class ExpenseGroup(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -51,6 +54,18 @@ class GroupExpense(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     receipt = models.ImageField(upload_to='expense_receipts/', null=True, blank=True)
     personal_expense = models.ForeignKey('expense.Expense', on_delete=models.SET_NULL, null=True, blank=True)  # Link to personal expense if synced
+    # Maintained by Postgres from description for full-text search
+    search_vector = models.GeneratedField(
+        expression=SearchVector('description', config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='groupexpense_search_idx'),
+            GinIndex(fields=['description'], name='groupexpense_desc_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self):
         return f"{self.description} - ₹{self.amount} by {self.paid_by.username}"
@@ -74,6 +89,31 @@ class ExpenseSplit(models.Model):
 
     class Meta:
         unique_together = ('expense', 'user')
+        indexes = [
+            models.Index(fields=['user', 'status'], name='split_user_status_idx'),
+            # Only unsettled splits are looked up when working out balances
+            models.Index(
+                fields=['expense', 'user'],
+                name='split_open_expense_user_idx',
+                condition=models.Q(status__in=['pending', 'requested']),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so the balance ledger can apply an exact delta on save
+        tracked = instance.get_deferred_fields() & set(SplitRow._fields)
+        instance._loaded_snapshot = None if tracked else instance.snapshot()
+        return instance
+
+    def snapshot(self):
+        return SplitRow(
+            self.expense_id,
+            self.user_id,
+            self.status,
+            to_cents(self.amount_owed),
+        )
 
     def __str__(self):
         return f"{self.user.username} owes ₹{self.amount_owed} for {self.expense.description} [{self.get_status_display()}]"
@@ -90,9 +130,43 @@ class Settlement(models.Model):
     transaction_reference = models.CharField(max_length=100, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        tracked = instance.get_deferred_fields() & set(SettlementRow._fields)
+        instance._loaded_snapshot = None if tracked else instance.snapshot()
+        return instance
+
+    def snapshot(self):
+        return SettlementRow(
+            self.group_id,
+            self.from_user_id,
+            self.to_user_id,
+            self.status,
+            to_cents(self.amount),
+        )
+
     def __str__(self):
         return f"{self.from_user} ➝ {self.to_user} ₹{self.amount} ({self.status})"
 
+
+class GroupBalance(models.Model):
+    """What debtor still owes creditor in a group, kept in step with ExpenseSplit and Settlement"""
+    group = models.ForeignKey(ExpenseGroup, on_delete=models.CASCADE, related_name="balances")
+    debtor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    creditor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    # Open splits owed, less settled payments; negative if overpaid
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Part of the open splits whose settlement awaits the creditor's confirmation
+    requested = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('group', 'debtor', 'creditor')
+
+    def __str__(self):
+        return f"{self.debtor_id} owes {self.creditor_id} ₹{self.amount} in {self.group_id}"
+
 class GroupInvitation(models.Model):
     group = models.ForeignKey(ExpenseGroup, on_delete=models.CASCADE)
     email = models.EmailField()
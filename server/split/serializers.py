@@ -1,8 +1,9 @@
+from decimal import Decimal
 from rest_framework import serializers
 from .models import ExpenseGroup, GroupMember
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import GroupExpense, ExpenseSplit
+from .models import GroupExpense, ExpenseSplit, Settlement
 
 
 # class GroupMemberSerializer(serializers.ModelSerializer):
@@ -54,3 +55,15 @@ class GroupExpenseSerializer(serializers.ModelSerializer):
     class Meta:
         model = GroupExpense
         fields = ['id', 'group', 'paid_by', 'amount', 'description', 'date', 'category', 'payment_method', 'split_type', 'created_at', 'updated_at', 'splits']
+
+
+class SettlementSerializer(serializers.ModelSerializer):
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+
+    class Meta:
+        model = Settlement
+        fields = [
+            'id', 'group', 'from_user', 'to_user', 'amount', 'status', 'created_at', 'completed_at',
+            'payment_method', 'transaction_reference', 'notes'
+        ]
+        read_only_fields = ['group', 'from_user', 'status', 'created_at', 'completed_at']
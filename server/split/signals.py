@@ -0,0 +1,57 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .ledger import apply_ledger_changes
+from .models import ExpenseGroup, ExpenseSplit, Settlement
+
+# Deleting these cascades to the ledger rows as well; nothing to keep exact
+LEDGER_OWNERS = (ExpenseGroup, User)
+
+
+def _remember_previous(sender, instance):
+    if instance._state.adding:
+        instance._loaded_snapshot = None
+        return
+
+    # Instances loaded with .only()/.defer() or built by hand don't carry a snapshot
+    if getattr(instance, "_loaded_snapshot", None) is None:
+        previous = sender.objects.filter(pk=instance.pk).first()
+        instance._loaded_snapshot = previous.snapshot() if previous else None
+
+
+def _changes(sender, old, new):
+    key = "split_changes" if sender is ExpenseSplit else "settlement_changes"
+    return {key: [(old, new)]}
+
+
+@receiver(pre_save, sender=ExpenseSplit)
+@receiver(pre_save, sender=Settlement)
+def remember_previous_row(sender, instance, **kwargs):
+    _remember_previous(sender, instance)
+
+
+@receiver(post_save, sender=ExpenseSplit)
+@receiver(post_save, sender=Settlement)
+def update_ledger_on_save(sender, instance, created, **kwargs):
+    new = instance.snapshot()
+    old = None if created else instance._loaded_snapshot
+    if old != new:
+        apply_ledger_changes(**_changes(sender, old, new))
+    instance._loaded_snapshot = new
+
+
+@receiver(pre_delete, sender=ExpenseSplit)
+@receiver(pre_delete, sender=Settlement)
+def remember_deleted_row(sender, instance, **kwargs):
+    if getattr(instance, "_loaded_snapshot", None) is None:
+        instance.refresh_from_db()
+        instance._loaded_snapshot = instance.snapshot()
+
+
+@receiver(post_delete, sender=ExpenseSplit)
+@receiver(post_delete, sender=Settlement)
+def update_ledger_on_delete(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, LEDGER_OWNERS):
+        return
+    apply_ledger_changes(**_changes(sender, instance._loaded_snapshot, None))
@@ -2,12 +2,13 @@
 from celery import shared_task
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
-import qrcode
 from io import BytesIO
 import base64
 from email.mime.image import MIMEImage
 from datetime import datetime
 
+from server import lazy
+
 @shared_task
 def send_payment_request_email(recipient_email, recipient_name, payer_name, amount, payer_upi_id):
     """
@@ -18,7 +19,7 @@ def send_payment_request_email(recipient_email, recipient_name, payer_name, amou
         upi_uri = f"upi://pay?pa={payer_upi_id}&pn={payer_name}&am={amount}&cu=INR"
 
         # Generate QR Code
-        qr = qrcode.make(upi_uri)
+        qr = lazy.get('qrcode').make(upi_uri)
         buffer = BytesIO()
         qr.save(buffer, format="PNG")
         qr_data = buffer.getvalue()
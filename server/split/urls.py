@@ -7,6 +7,10 @@ urlpatterns = [
     path('groups/', views.list_groups, name='list_groups'),
     path('groups/create/', views.create_group, name='create_group'),
     path('groups/delete/<uuid:group_id>/', views.delete_group, name='delete_group'),
+    path('groups/<uuid:group_id>/balances/', views.group_balances, name='group_balances'),
+    path('groups/<uuid:group_id>/settlements/', views.group_settlements, name='group_settlements'),
+    path('settlements/<int:settlement_id>/confirm/', views.confirm_payment, name='confirm_payment'),
+    path('settlements/<int:settlement_id>/cancel/', views.cancel_payment, name='cancel_payment'),
 
     # path('groups/<uuid:group_id>/add_member/', views.add_member, name='add_member'),
     # path('groups/<uuid:group_id>/remove_member/<int:user_id>/', views.remove_member, name='remove_member'),
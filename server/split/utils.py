@@ -1,33 +1,105 @@
+import heapq
 from collections import defaultdict
-from .models import ExpenseSplit, GroupMember
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db.models import F, Sum
+
+from .models import ExpenseSplit, GroupBalance, GroupMember
+
+CENT = Decimal('0.01')
+# Splits not yet confirmed by the payer still count as owed
+OPEN_STATUSES = (ExpenseSplit.Status.PENDING, ExpenseSplit.Status.REQUESTED)
+
+
+def open_debts(group):
+    """
+    Outstanding amounts in ``group`` as {(debtor_id, creditor_id, status): total},
+    from one grouped query. A payer's own share of an expense is not a debt.
+    """
+    rows = (
+        ExpenseSplit.objects.filter(expense__group=group, status__in=OPEN_STATUSES)
+        .exclude(user_id=F('expense__paid_by_id'))
+        .values('user_id', 'expense__paid_by_id', 'status')
+        .annotate(total=Sum('amount_owed')).order_by()
+        .values_list('user_id', 'expense__paid_by_id', 'status', 'total')
+    )
+    return {(debtor, creditor, split_status): total for debtor, creditor, split_status, total in rows}
+
 
 def calculate_balances(group):
-    balances = defaultdict(float)
-    
-    # Calculate who owes what
-    for split in ExpenseSplit.objects.filter(expense__group=group, is_settled=False):
-        balances[(split.user.id, split.expense.paid_by.id)] += float(split.amount_owed)
-    
-    # Net balances per user
-    net_balances = defaultdict(float)
-    for (debtor, creditor), amount in balances.items():
+    """
+    Each member's net balance in ``group`` (positive: is owed money) and the
+    fewest transfers that would settle everyone up. ``requested`` is the part
+    of a balance whose settlement is awaiting the payer's confirmation.
+
+    Read from the GroupBalance ledger, one row per debtor/creditor pair,
+    rather than from the group's splits.
+    """
+    net_balances = defaultdict(Decimal)
+    requested = defaultdict(Decimal)
+    ledger = GroupBalance.objects.filter(group=group).values_list('debtor_id', 'creditor_id', 'amount', 'requested')
+    for debtor, creditor, amount, awaiting in ledger:
         net_balances[debtor] -= amount
         net_balances[creditor] += amount
-    
-    # Prepare response
-    members = {m.user.id: m.user.username for m in GroupMember.objects.filter(group=group)}
+        requested[debtor] -= awaiting
+        requested[creditor] += awaiting
+
+    members = dict(GroupMember.objects.filter(group=group).values_list('user_id', 'user__username'))
+    # Former members can still owe or be owed
+    missing = set(net_balances) - set(members)
+    if missing:
+        members.update(User.objects.filter(id__in=missing).values_list('id', 'username'))
+
     return {
         'balances': [
             {
                 'user_id': uid,
-                'username': members[uid],
-                'balance': balance
-            } for uid, balance in net_balances.items()
+                'username': username,
+                'balance': net_balances[uid].quantize(CENT),
+                'requested': requested[uid].quantize(CENT),
+            } for uid, username in members.items()
+        ],
+        'simplified_debts': [
+            {
+                'from_user': debtor,
+                'from_username': members[debtor],
+                'to_user': creditor,
+                'to_username': members[creditor],
+                'amount': amount,
+            } for debtor, creditor, amount in simplify_balances(net_balances)
         ],
-        'simplified_debts': simplify_balances(net_balances)
     }
 
+
 def simplify_balances(net_balances):
-    # Implement debt simplification algorithm here
-    # (Reduces multiple debts to minimal transactions)
-    return []
\ No newline at end of file
+    """
+    Transfers (debtor, creditor, amount) that settle ``net_balances``.
+
+    Greedy: the largest debtor pays the largest creditor as much as both
+    allow, and whoever is left with a remainder goes back on their heap.
+    Each transfer clears at least one person, so n people need at most
+    n - 1 transfers. Amounts are matched in whole cents, ties broken by user
+    id so the plan is stable between calls.
+    """
+    debtors, creditors = [], []
+    for user_id, balance in net_balances.items():
+        cents = int((balance / CENT).to_integral_value())
+        if cents < 0:
+            debtors.append((cents, user_id))  # Most negative first
+        elif cents > 0:
+            creditors.append((-cents, user_id))
+    heapq.heapify(debtors)
+    heapq.heapify(creditors)
+
+    transfers = []
+    while debtors and creditors:
+        owes, debtor = heapq.heappop(debtors)
+        owed, creditor = heapq.heappop(creditors)
+        amount = min(-owes, -owed)
+        transfers.append((debtor, creditor, amount * CENT))
+        if owes + amount:
+            heapq.heappush(debtors, (owes + amount, debtor))
+        if owed + amount:
+            heapq.heappush(creditors, (owed + amount, creditor))
+    return transfers
@@ -10,19 +10,23 @@ from decimal import Decimal
 
 from expense.models import Expense
 from expense.serializers import ExpenseSerializer
-from expense.tasks import send_budget_alert_email_task
+from expense.alerts import evaluate_budget_alerts
+from expense.idempotency import idempotent
 
-from .models import GroupExpense, ExpenseSplit
-from .serializers import GroupExpenseSerializer, ExpenseSplitSerializer
+from .models import GroupExpense, ExpenseSplit, Settlement
+from .serializers import GroupExpenseSerializer, ExpenseSplitSerializer, SettlementSerializer
+from .utils import calculate_balances
 from decimal import Decimal
 
 import json
+from functools import partial
 
 from  .tasks  import send_payment_request_email
 from users.models import UserProfile
 
 
 from django.db import transaction
+from django.utils import timezone
 from datetime import datetime
 
 from cloudinary.uploader import upload
@@ -203,9 +207,25 @@ def get_group_expenses(request, group_id):
 
 
 
+# Net balance per member and the fewest transfers that settle the group
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def group_balances(request, group_id):
+    group = get_object_or_404(ExpenseGroup, id=group_id)
+
+    if not group.members.filter(user=request.user).exists():
+        return Response({"detail": "You are not a member of this group."}, status=status.HTTP_403_FORBIDDEN)
+
+    return Response(calculate_balances(group), status=status.HTTP_200_OK)
+
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent('group-expense-create')
+@transaction.atomic
 def create_group_expense(request):
+    # One transaction, so the expense, its splits and the balance ledger land together
     data = request.data
     # print(data)
     # Get the group by ID
@@ -256,6 +276,7 @@ def create_group_expense(request):
             total_entered_amount = sum(Decimal(split['amount_owed']) for split in data['splits'])
 
             if total_entered_amount != total_amount:
+                transaction.set_rollback(True)
                 return Response(
                     {"message": f"Check the Total entered amount ({total_amount})."},
                     status=400
@@ -274,6 +295,7 @@ def create_group_expense(request):
             total_percent = sum([split['percentage'] for split in data['splits'] if split['percentage'] is not None])
 
             if total_percent != 100:
+                transaction.set_rollback(True)
                 return Response({"detail": "Total percentage must be 100."}, status=status.HTTP_400_BAD_REQUEST)
 
             for member_data in data['splits']:
@@ -314,36 +336,17 @@ def create_group_expense(request):
         if individual_user_expense_serializer.is_valid():
             
             try:
-                 # Calculate total expenses for the current month
-                 current_month = datetime.now().month
-                 current_year = datetime.now().year
-                 total_expenses = sum(
-                 exp.amount for exp in Expense.objects.filter(
-                    user=request.user,
-                    date__month=current_month,
-                    date__year=current_year
-                )
-            )
                  user_profile = UserProfile.objects.get(user=request.user)
                  individual_user_expense_serializer.save()
             except UserProfile.DoesNotExist:
             # If UserProfile does not exist, return a response to update the profile
+                 transaction.set_rollback(True)
                  return Response(
                 {"detail": "User profile not found. Please update your profile."},
                 status=status.HTTP_422_UNPROCESSABLE_ENTITY
             )
-            # user_profile = UserProfile.objects.get(user=request.user)
-            print("Total expenses for the month:", total_expenses , "Monthly budget:", user_profile.monthly_budget)
-            # Check if total exceeds budget
-            if total_expenses > user_profile.monthly_budget:
-                print("Total expenses exceed budget!")
-                # Send email asynchronously using thread
-                send_budget_alert_email_task.delay(
-                    request.user.email,
-                    request.user.username,
-                    total_expenses,
-                    user_profile.monthly_budget
-                )
+            # Alert only on newly crossed budget thresholds
+            evaluate_budget_alerts(request.user, user_profile)
         else:
             print("invalid Data")
 
@@ -353,13 +356,15 @@ def create_group_expense(request):
         # Notify members who owe money (except the payer)
         for split in ExpenseSplit.objects.filter(expense=expense):
             if split.user != request.user and split.amount_owed > 0:
-                send_payment_request_email.delay(
+                # Only once the expense and its splits are committed
+                transaction.on_commit(partial(
+                    send_payment_request_email.delay,
                     recipient_email=split.user.email,
                     recipient_name=split.user.username,
                     payer_name=request.user.username,
                     amount=str(split.amount_owed),
                     payer_upi_id = upi_id
-                )
+                ))
 
         return Response(GroupExpenseSerializer(expense).data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -528,4 +533,74 @@ def handle_settlement_action(request, new_status, action_name):
         return Response(
             {"detail": f"Error processing settlement: {str(e)}"},
             status=status.HTTP_400_BAD_REQUEST
-        )
\ No newline at end of file
+        )
+
+
+
+# Direct payments between members, recorded against the balance ledger once confirmed
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+@idempotent('settlement-create')
+def group_settlements(request, group_id):
+    group = get_object_or_404(ExpenseGroup, id=group_id)
+
+    if not group.members.filter(user=request.user).exists():
+        return Response({"detail": "You are not a member of this group."}, status=status.HTTP_403_FORBIDDEN)
+
+    if request.method == 'GET':
+        settlements = Settlement.objects.filter(group=group).order_by('-created_at')
+        return Response(SettlementSerializer(settlements, many=True).data)
+
+    serializer = SettlementSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    to_user = serializer.validated_data['to_user']
+    if to_user == request.user or not group.members.filter(user=to_user).exists():
+        return Response(
+            {"detail": "Payments must go to another member of this group."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    settlement = serializer.save(group=group, from_user=request.user)
+    return Response(SettlementSerializer(settlement).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def confirm_payment(request, settlement_id):
+    return handle_payment_action(request, settlement_id, 'settled')
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cancel_payment(request, settlement_id):
+    return handle_payment_action(request, settlement_id, 'cancelled')
+
+
+
+def handle_payment_action(request, settlement_id, new_status):
+    with transaction.atomic():
+        settlement = get_object_or_404(Settlement.objects.select_for_update(), id=settlement_id)
+
+        # Only the recipient confirms; either side may cancel
+        allowed = [settlement.to_user_id]
+        if new_status == 'cancelled':
+            allowed.append(settlement.from_user_id)
+        if request.user.id not in allowed:
+            return Response(
+                {"detail": "You are not allowed to change this payment."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        if settlement.status != 'pending':
+            return Response(
+                {"detail": f"Payment is already {settlement.status}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        settlement.status = new_status
+        if new_status == 'settled':
+            settlement.completed_at = timezone.now()
+        settlement.save()
+
+    return Response(SettlementSerializer(settlement).data, status=status.HTTP_200_OK)
@@ -24,6 +24,8 @@ from .serializers import UserMiniSerializer
 from decouple import config
 
 from .tokens import get_tokens_for_user
+from expense.alerts import rearm_budget_alerts
+from expense.models import BudgetAlertState
 
 
 # Register API
@@ -92,7 +94,11 @@ def create_or_update_profile(request):
         profile, created = UserProfile.objects.get_or_create(user=request.user)
         serializer = UserProfileSerializer(profile, data=request.data, partial=True)
         if serializer.is_valid():
+            previous_budget = profile.monthly_budget
             serializer.save(user=request.user)
+            if profile.monthly_budget != previous_budget:
+                # Let alerts fire again against the new budget
+                rearm_budget_alerts(request.user, [BudgetAlertState.OVERALL])
             return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e: